@@ -0,0 +1,74 @@
+"""
+Benchmark: cost of per-request DB connections vs persistent connections.
+
+Simulates N request cycles (request_started -> purchased-amount aggregate ->
+request_finished) against the configured `default` database, once with
+CONN_MAX_AGE=0 (Django's old default: connect per request) and once with
+persistent connections, and reports the raw connect time too.
+
+Needs a reachable database (e.g. `docker compose up db` and the .env values):
+    python -m benchmarks.db_connection_bench [--requests 500]
+"""
+import argparse
+import os
+import statistics
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+django.setup()
+
+from django.core.signals import request_finished, request_started  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.db.models import Sum  # noqa: E402
+
+from stocks import db as db_stats  # noqa: E402
+from stocks.models import Stock  # noqa: E402
+
+
+def _connect_ms(samples):
+    conn = connections["default"]
+    times = []
+    for _ in range(samples):
+        conn.close()
+        start = time.perf_counter()
+        conn.connect()
+        times.append((time.perf_counter() - start) * 1000)
+    conn.close()
+    return statistics.median(times)
+
+
+def _requests(n, conn_max_age):
+    conn = connections["default"]
+    conn.close()
+    conn.settings_dict["CONN_MAX_AGE"] = conn_max_age
+    opened_before = db_stats.connections_opened()
+
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        request_started.send(sender=None)
+        Stock.objects.filter(company_code="AAPL").aggregate(total=Sum("amount"))
+        request_finished.send(sender=None)
+        times.append((time.perf_counter() - start) * 1000)
+
+    conn.close()
+    return statistics.median(times), db_stats.connections_opened() - opened_before
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--persistent-age", type=int, default=600)
+    args = parser.parse_args()
+
+    print(f"connect():                median {_connect_ms(20):7.2f} ms")
+    for label, age in (("per-request (0)", 0), (f"persistent ({args.persistent_age})", args.persistent_age)):
+        median, opened = _requests(args.requests, age)
+        print(f"CONN_MAX_AGE={label:<18} median {median:7.2f} ms/request, "
+              f"{opened} connections for {args.requests} requests")
+
+
+if __name__ == "__main__":
+    main()
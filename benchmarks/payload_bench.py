@@ -0,0 +1,89 @@
+"""
+Benchmark: hot-path GET /api/stock/{symbol}/ throughput on cache hits.
+
+  before: cached dict, re-rendered by DRF's stdlib JSONRenderer per request
+  after:  cached RenderedPayload, bytes written straight to the response
+          (plus a FastJSONRenderer-only row to isolate the renderer gain)
+
+Throttling is disabled and no DB/network is touched: only view + cache +
+rendering are measured, in-process through Django's test client.
+
+Usage:
+    python -m benchmarks.payload_bench [--requests 5000]
+"""
+import argparse
+import os
+import time
+from unittest.mock import patch
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+django.setup()
+
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from stocks.renderers import FastJSONRenderer  # noqa: E402
+from stocks.services import stock_service  # noqa: E402
+from stocks.views import StockView  # noqa: E402
+
+SYMBOL = "AAPL"
+PAYLOAD = {
+    "status": "ok",
+    "purchased_amount": 2.5,
+    "purchased_status": "purchased",
+    "request_date": "2025-08-22",
+    "company_code": SYMBOL,
+    "company_name": "Apple Inc.",
+    "stock_values": {"open": 226.17, "high": 229.09, "low": 225.41, "close": 227.76},
+    "performance_data": {
+        "five_days": 1.23, "one_month": 3.45, "three_months": 6.78,
+        "year_to_date": 9.01, "one_year": 12.34,
+    },
+    "competitors": [
+        {"name": f"Competitor {i} Corp.", "market_cap": {"currency": "$", "value": 1.5e12 / (i + 1)}}
+        for i in range(10)
+    ],
+}
+
+
+def _run(client, n, **headers):
+    url = f"/api/stock/{SYMBOL}/"
+    client.get(url, **headers)  # warm-up
+    start = time.perf_counter()
+    for _ in range(n):
+        client.get(url, **headers)
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    client = Client()
+    key = stock_service._cache_key(SYMBOL)
+    rows = []
+
+    with patch.object(StockView, "throttle_classes", []):
+        stock_service.cache.set(key, dict(PAYLOAD), 3600)
+        with patch.object(StockView, "renderer_classes", [JSONRenderer]):
+            rows.append(("before: dict + JSONRenderer", _run(client, args.requests)))
+        with patch.object(StockView, "renderer_classes", [FastJSONRenderer]):
+            rows.append(("dict + FastJSONRenderer", _run(client, args.requests)))
+
+        stock_service.cache.set(key, stock_service.render_payload(PAYLOAD), 3600)
+        rows.append(("after: cached bytes", _run(client, args.requests)))
+        rows.append(("after: cached gzip bytes",
+                     _run(client, args.requests, HTTP_ACCEPT_ENCODING="gzip")))
+
+    base = rows[0][1]
+    for label, rps in rows:
+        print(f"{label:<30} {rps:10.0f} req/s  ({rps / base:4.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: worker startup — import time and time to the first successful
+GET /api/stock/{symbol}/, with scraping enabled and disabled.
+
+Each sample runs in a fresh interpreter. Upstream HTTP (Polygon, MarketWatch)
+is replaced by canned responses so only our own import/parse/DB/render work is
+measured; the configured database must be reachable and migrated.
+
+Usage:
+    python -m benchmarks.startup_bench [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_CHILD = r'''
+import json, sys, time
+t0 = time.perf_counter()
+import django
+django.setup()
+import server.urls  # noqa: F401  (views + service layer, as a worker boot would)
+t1 = time.perf_counter()
+boot_modules = {"bs4", "lxml"} & set(sys.modules)
+
+from unittest.mock import Mock, patch
+from django.test import Client
+from django.test.utils import setup_test_environment
+
+HTML = ("<html><div class='element element--table performance'><table>"
+        "<tr class='table__row'><td class='table__cell'>5 Day</td>"
+        "<td class='table__cell'>+1.2%</td></tr></table></div></html>")
+
+def fake_get(url, *args, **kwargs):
+    r = Mock(status_code=200, text=HTML)
+    if "/v3/reference/tickers" in url:
+        r.json.return_value = {"results": [{"name": "Apple Inc."}]}
+    else:
+        r.json.return_value = {"status": "OK", "open": 1, "high": 2, "low": 0.5,
+                               "close": 1.5, "from": "2025-08-22", "symbol": "AAPL"}
+    return r
+
+setup_test_environment()
+with patch("requests.get", side_effect=fake_get):
+    resp = Client().get("/api/stock/AAPL/")
+t2 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "first_request_ms": (t2 - t1) * 1000,
+                  "status": resp.status_code, "boot_modules": sorted(boot_modules)}))
+'''
+
+
+def _sample(scraping: bool):
+    env = dict(os.environ)
+    env.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+    env.setdefault("POLYGON_BASE_URL", "https://api.polygon.invalid")
+    env["SCRAPING_ENABLED"] = "true" if scraping else "false"
+    out = subprocess.run([sys.executable, "-c", _CHILD], env=env, cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for scraping in (True, False):
+        samples = [_sample(scraping) for _ in range(args.runs)]
+        statuses = {s["status"] for s in samples}
+        print(f"SCRAPING_ENABLED={str(scraping).lower():<5} "
+              f"import {statistics.median(s['import_ms'] for s in samples):7.1f} ms, "
+              f"first request {statistics.median(s['first_request_ms'] for s in samples):7.1f} ms "
+              f"(status {sorted(statuses)}, parser stack at boot: {samples[0]['boot_modules'] or 'none'})")
+
+
+if __name__ == "__main__":
+    main()
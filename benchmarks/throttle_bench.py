@@ -0,0 +1,78 @@
+"""
+Microbenchmark: per-request overhead of GCRAThrottle vs DRF's SimpleRateThrottle.
+
+SimpleRateThrottle stores one timestamp per request inside the window, so the
+cached value (and its pickle round-trip) grows with the rate. GCRA stores a
+single float.
+
+Usage:
+    python -m benchmarks.throttle_bench [--requests 20000] [--rate 1000/min]
+"""
+import argparse
+import os
+import pickle
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+django.setup()
+
+from django.core.cache import cache, caches  # noqa: E402
+from rest_framework.throttling import SimpleRateThrottle  # noqa: E402
+
+from stocks.throttling import GCRAThrottle  # noqa: E402
+
+
+class _Request:
+    method = "GET"
+    user = None
+    META = {"REMOTE_ADDR": "10.0.0.1"}
+
+
+class _View:
+    pass
+
+
+class _Simple(SimpleRateThrottle):
+    def get_cache_key(self, request, view):
+        return "bench_simple_" + self.get_ident(request)
+
+
+class _GCRA(GCRAThrottle):
+    def get_cache_key(self, request, view):
+        return "bench_gcra_" + self.get_ident(request)
+
+
+def _run(throttle_cls, n):
+    request, view = _Request(), _View()
+    start = time.perf_counter()
+    for _ in range(n):
+        throttle_cls().allow_request(request, view)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rate", default="1000/min")
+    args = parser.parse_args()
+
+    _Simple.rate = args.rate
+    _GCRA.get_rate = lambda self: args.rate
+    cache.clear()
+
+    simple_us = _run(_Simple, args.requests)
+    gcra_us = _run(_GCRA, args.requests)
+
+    simple_bytes = len(pickle.dumps(cache.get("bench_simple_10.0.0.1", [])))
+    gcra_bytes = len(pickle.dumps(cache.get("bench_gcra_10.0.0.1", 0.0)))
+
+    print(f"cache backend:       {caches['default'].__class__.__name__}")
+    print(f"rate:                {args.rate}  ({args.requests} requests, one client)")
+    print(f"SimpleRateThrottle:  {simple_us:8.2f} us/request, state {simple_bytes} bytes")
+    print(f"GCRAThrottle:        {gcra_us:8.2f} us/request, state {gcra_bytes} bytes")
+
+
+if __name__ == "__main__":
+    main()
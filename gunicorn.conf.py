@@ -0,0 +1,34 @@
+# gunicorn.conf.py
+# Production launch profile:
+#   gunicorn -c gunicorn.conf.py server.wsgi:application
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Threaded workers: SSE streams (/api/stream/) hold a thread each, at most
+# STREAM_MAX_OPEN per process, so keep GUNICORN_THREADS above it.
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Import Django once in the master, then fork: faster boot, shared memory pages.
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then to cap slow leaks.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = 200
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    # Never share sockets opened in the master (preload) across workers.
+    from django.db import connections
+    connections.close_all()
@@ -26,9 +26,9 @@ load_dotenv(BASE_DIR / ".app.env", override=False)
 SECRET_KEY = 'django-insecure-z(pw&+ds(cx3yxz*&r0-iu6p1+jf47mzt3pyef$w=eyzvvaoz='
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv("DJANGO_DEBUG", "true").lower() in ("1", "true", "yes")
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [h.strip() for h in os.getenv("DJANGO_ALLOWED_HOSTS", "").split(",") if h.strip()]
 
 # Application definition
 
@@ -51,6 +51,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # no-op unless STOCK_PROFILING_ENABLED (see PROFILING below)
+    'stocks.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'server.urls'
@@ -84,10 +86,85 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        # Persistent connections: reuse a worker thread's connection across
+        # requests instead of reconnecting per request (0 = per-request).
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        # Ping a reused connection before the first query of a request, so a
+        # connection dropped by Postgres/pgbouncer is replaced transparently.
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "5")),
+        },
     }
 }
 
 
+# Read replicas: DB_REPLICA_HOSTS=host1,host2 adds "replica_0", "replica_1", ...
+# with the primary's credentials (DB_REPLICA_NAME / DB_REPLICA_PORT override
+# the database name/port, e.g. a second local database standing in for one).
+# Reads of the stocks app go to a replica, except for DB_STICKY_PRIMARY_SECONDS
+# after a write to the same ticker (read-your-writes, see stocks/db_router.py).
+
+DATABASE_REPLICAS = []
+for _i, _host in enumerate(h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()):
+    _alias = f"replica_{_i}"
+    DATABASES[_alias] = {
+        **DATABASES["default"],
+        "HOST": _host,
+        "NAME": os.getenv("DB_REPLICA_NAME", DATABASES["default"]["NAME"]),
+        "PORT": os.getenv("DB_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ["stocks.db_router.ReplicaRouter"]
+DB_STICKY_PRIMARY_SECONDS = int(os.getenv("DB_STICKY_PRIMARY_SECONDS", "10"))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# "default" is the shared (L2) cache: Redis when REDIS_URL is set. For local
+# multi-worker runs without Redis use CACHE_L2_BACKEND=db or file; the
+# fallback (locmem) is per-process and only suitable for tests/runserver.
+# Throttle state lives here.
+# "stock" puts a small per-process LRU (L1) in front of it for payloads.
+
+REDIS_URL = os.getenv("REDIS_URL", "")
+CACHE_L2_BACKEND = os.getenv("CACHE_L2_BACKEND", "redis" if REDIS_URL else "locmem")
+
+_L2_CACHES = {
+    "redis": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+    },
+    "db": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "stock_cache",  # python manage.py createcachetable
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("CACHE_FILE_DIR", "/tmp/stock-api-cache"),
+    },
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
+CACHES = {
+    "default": _L2_CACHES[CACHE_L2_BACKEND],
+    "stock": {
+        "BACKEND": "stocks.cache.TieredCache",
+        "LOCATION": "default",
+        "OPTIONS": {
+            "L1_TIMEOUT": float(os.getenv("STOCK_CACHE_L1_SECONDS", "5")),
+            "L1_MAX_ENTRIES": int(os.getenv("STOCK_CACHE_L1_MAX_ENTRIES", "512")),
+            "POLL_INTERVAL": float(os.getenv("CACHE_INVALIDATION_POLL_SECONDS", "0.5")),
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -129,6 +206,23 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# --- PROFILING & METRICS ---------------------------------------------------
+# Sampled + slow-request profiles of /api/stock/{symbol}/ (manage.py stock_profiles)
+
+STOCK_PROFILING_ENABLED = os.getenv("STOCK_PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+# share of requests run under cProfile (pstats)
+STOCK_PROFILE_SAMPLE_RATE = float(os.getenv("STOCK_PROFILE_SAMPLE_RATE", "0.01"))
+# other requests are stack-sampled and kept when at least this slow (0 = off)
+STOCK_PROFILE_SLOW_MS = float(os.getenv("STOCK_PROFILE_SLOW_MS", "1000"))
+STOCK_PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("STOCK_PROFILE_SAMPLE_INTERVAL_MS", "5"))
+STOCK_PROFILE_DIR = os.getenv("STOCK_PROFILE_DIR", "/tmp/stock-profiles")
+# ring buffer size: oldest profiles are deleted beyond this
+STOCK_PROFILE_KEEP = int(os.getenv("STOCK_PROFILE_KEEP", "200"))
+
+# GET /api/metrics/ (Polygon latency/hedging, prefetch counters), staff users only; false = 404
+STOCK_METRICS_ENABLED = os.getenv("STOCK_METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
 # --- LOGGING ---------------------------------------------------------------
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -153,16 +247,23 @@ LOGGING = {
 
 # --- DRF ---------------------------------------------------------------
 REST_FRAMEWORK = {
+    # orjson-backed when installed; cached payloads bypass rendering entirely
+    "DEFAULT_RENDERER_CLASSES": [
+        "stocks.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    # GCRA throttles keep one timestamp per client in the cache (constant memory)
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",     # by Ip
-        "rest_framework.throttling.ScopedRateThrottle",   # by scope (see view)
+        "stocks.throttling.AnonGCRAThrottle",     # by Ip
+        "stocks.throttling.ScopedGCRAThrottle",   # by view scope, reads/writes split
     ],
     "DEFAULT_THROTTLE_RATES": {
         # global
-        "anon": "45/min",
-        # specific to view
-        "stock": "45/min",   # GET/POST /api/stock/{ticker}
+        "anon": os.getenv("THROTTLE_ANON_RATE", "45/min"),
+        # specific to view: GET / POST /api/stock/{ticker}
+        "stock_read": os.getenv("THROTTLE_STOCK_READ_RATE", "45/min"),
+        "stock_write": os.getenv("THROTTLE_STOCK_WRITE_RATE", "45/min"),
+        # new SSE connections on /api/stream/
+        "stream_read": os.getenv("THROTTLE_STREAM_RATE", "10/min"),
     },
 }
-
-
@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
-from stocks.views import StockView
+from stocks.views import StockView, StockPurchasesView, QuoteStreamView, MetricsView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/stock/<str:symbol>/", StockView.as_view()),
+    path("api/stock/<str:symbol>/purchases/", StockPurchasesView.as_view()),
+    path("api/stream/", QuoteStreamView.as_view()),
+    path("api/metrics/", MetricsView.as_view()),
 ]
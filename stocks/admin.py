@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Stock
+from .models import Stock, ScrapeSnapshot
 
 @admin.register(Stock)
 class StockAdmin(admin.ModelAdmin):
@@ -8,3 +8,10 @@ class StockAdmin(admin.ModelAdmin):
     list_filter   = ("company_code",)
     ordering      = ("-id",)
 
+
+
+@admin.register(ScrapeSnapshot)
+class ScrapeSnapshotAdmin(admin.ModelAdmin):
+    list_display  = ("company_code", "scraped_at")
+    search_fields = ("company_code",)
+    ordering      = ("-scraped_at",)
@@ -0,0 +1,213 @@
+"""
+Two-tier cache backend: a small in-process L1 in front of a shared L2.
+
+    CACHES = {
+        "default": {...shared backend (Redis / database / file)...},
+        "stock": {
+            "BACKEND": "stocks.cache.TieredCache",
+            "LOCATION": "default",              # alias of the L2 cache
+            "OPTIONS": {"L1_TIMEOUT": 5, "L1_MAX_ENTRIES": 512, "POLL_INTERVAL": 0.5},
+        },
+    }
+
+L1 is a per-process LRU (Django's LocMemCache) with a short TTL, so hot keys
+are served without a network round-trip. Writes go to both tiers.
+
+Deletes are published as invalidation messages in L2: one short-lived key
+per message, numbered by a sequence counter. Publishers claim their message
+slot with `add` (atomic on every backend, unlike `incr` on the database and
+file backends), so concurrent deletes never overwrite each other; the counter
+is only a hint that readers look a few slots past and repair. Every process
+polls at most once per POLL_INTERVAL and evicts the listed keys from its own
+L1, so a `bust_cache` served by one worker takes effect in all of them. If a
+process falls too far behind (or messages expired) it simply drops its whole
+L1.
+"""
+import time
+import logging
+import threading
+from typing import Any, Optional
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+log = logging.getLogger(__name__)
+
+_MISSING = object()
+_CLEAR_ALL = "*"
+# Slots readers check past the counter (publishers racing on a stale counter)
+_PROBE = 4
+
+# Per-process invalidation cursor, keyed by L1 name (shared by all threads).
+_cursors = {}
+_cursor_lock = threading.Lock()
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location: str, params: dict):
+        super().__init__(params)
+        options = params.get("OPTIONS", {}) or {}
+
+        self._l2_alias = location or "default"
+        self.l1_timeout = float(options.get("L1_TIMEOUT", 5))
+        self.poll_interval = float(options.get("POLL_INTERVAL", 0.5))
+        self.message_timeout = int(options.get("MESSAGE_TIMEOUT", 60))
+        self.max_backlog = int(options.get("MAX_BACKLOG", 100))
+
+        self._l1_name = options.get("L1_NAME", f"tiered:{self._l2_alias}")
+        self._l1 = LocMemCache(self._l1_name, {
+            "TIMEOUT": self.l1_timeout,
+            "OPTIONS": {"MAX_ENTRIES": int(options.get("L1_MAX_ENTRIES", 512))},
+        })
+        self._channel = options.get("CHANNEL", f"tiered:inval:{self._l2_alias}")
+        with _cursor_lock:
+            self._cursor = _cursors.setdefault(self._l1_name, {"seq": None, "polled_at": 0.0})
+
+    @property
+    def l2(self) -> BaseCache:
+        return caches[self._l2_alias]
+
+    # --- timeouts ------------------------------------------------------------
+
+    def _l2_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _l1_timeout_for(self, timeout) -> Optional[float]:
+        timeout = self._l2_timeout(timeout)
+        if timeout is None:
+            return self.l1_timeout
+        return min(self.l1_timeout, timeout)
+
+    # --- cache API -----------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        self._sync()
+        value = self._l1.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+
+        value = self.l2.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            return default
+        self._l1.set(key, value, self.l1_timeout, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, self._l2_timeout(timeout), version=version)
+        self._l1.set(key, value, self._l1_timeout_for(timeout), version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, self._l2_timeout(timeout), version=version)
+        if added:
+            self._l1.set(key, value, self._l1_timeout_for(timeout), version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._l1.delete(key, version=version)
+        return self.l2.touch(key, self._l2_timeout(timeout), version=version)
+
+    def delete(self, key, version=None):
+        self._l1.delete(key, version=version)
+        deleted = self.l2.delete(key, version=version)
+        self._publish(key, version)
+        return deleted
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        self._l1.delete(key, version=version)
+        return self.l2.incr(key, delta, version=version)
+
+    def clear(self):
+        self._l1.clear()
+        self.l2.clear()
+        self._publish(_CLEAR_ALL, None)
+
+    def clear_local(self) -> None:
+        """
+        Drop this process' L1 only (e.g. in tests or after a fork).
+        """
+        self._l1.clear()
+
+    # --- invalidation channel -------------------------------------------------
+
+    def _seq_key(self) -> str:
+        return f"{self._channel}:seq"
+
+    def _msg_key(self, seq: int) -> str:
+        return f"{self._channel}:{seq}"
+
+    def _publish(self, key: str, version: Optional[int]) -> None:
+        """
+        Append an invalidation message for `key` to the shared channel.
+        """
+        try:
+            seq = int(self.l2.get(self._seq_key(), 0)) + 1
+            # Another publisher may hold this slot (stale counter): take the next free one.
+            while not self.l2.add(self._msg_key(seq), (key, version), self.message_timeout):
+                seq += 1
+            self.l2.set(self._seq_key(), seq, None)
+            # Our own L1 is already consistent; don't replay our message.
+            with _cursor_lock:
+                if self._cursor["seq"] is not None and self._cursor["seq"] == seq - 1:
+                    self._cursor["seq"] = seq
+        except Exception:
+            log.exception("Could not publish cache invalidation for %s", key)
+
+    def _sync(self) -> None:
+        """
+        Apply invalidation messages published by other processes, at most once
+        per poll interval.
+        """
+        now = time.monotonic()
+        with _cursor_lock:
+            if now - self._cursor["polled_at"] < self.poll_interval:
+                return
+            self._cursor["polled_at"] = now
+            seen = self._cursor["seq"]
+
+        try:
+            current = self.l2.get(self._seq_key(), 0)
+        except Exception:
+            log.warning("Cache invalidation channel unavailable; serving L1 as-is.")
+            return
+
+        if seen is None:
+            self._advance(current)
+            return
+
+        if current < seen or current - seen > self.max_backlog:
+            self._l1.clear()
+            self._advance(current)
+            return
+
+        slots = range(seen + 1, current + 1 + _PROBE)
+        messages = self.l2.get_many([self._msg_key(s) for s in slots])
+        last = current
+        if any(self._msg_key(s) not in messages for s in range(seen + 1, current + 1)):
+            # Some messages expired before we saw them: play it safe.
+            self._l1.clear()
+            slots = range(current + 1, current + 1 + _PROBE)
+        for s in slots:
+            message = messages.get(self._msg_key(s))
+            if message is None:
+                if s > current:
+                    break
+                continue
+            last = max(last, s)
+            key, version = message
+            if key == _CLEAR_ALL:
+                self._l1.clear()
+            else:
+                self._l1.delete(key, version=version)
+
+        if last > current:
+            # A publisher's counter write was overtaken by a stale one; repair it.
+            self.l2.set(self._seq_key(), last, None)
+        self._advance(last)
+
+    def _advance(self, seq: Any) -> None:
+        with _cursor_lock:
+            self._cursor["seq"] = seq
@@ -0,0 +1,33 @@
+import time
+import logging
+import threading
+
+from django.db.backends.signals import connection_created
+
+log = logging.getLogger(__name__)
+
+# Process-wide count of DB connections opened; with persistent connections
+# (CONN_MAX_AGE > 0) this should stay around workers × threads.
+_lock = threading.Lock()
+_opened = 0
+_started = time.monotonic()
+
+
+def connections_opened() -> int:
+    return _opened
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    global _opened
+    with _lock:
+        _opened += 1
+        opened = _opened
+    log.debug(
+        "DB connection opened (alias=%s, CONN_MAX_AGE=%s, #%d in this process after %.0fs)",
+        connection.alias, connection.settings_dict.get("CONN_MAX_AGE"),
+        opened, time.monotonic() - _started,
+    )
+
+
+def connect_signals() -> None:
+    connection_created.connect(_on_connection_created, dispatch_uid="stocks.db.connection_created")
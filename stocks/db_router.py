@@ -0,0 +1,79 @@
+import random
+import contextvars
+from contextlib import contextmanager
+from typing import Iterator
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+PRIMARY = "default"
+_PIN_PREFIX = "db:pin-primary:"
+
+# Set while a block of code must read from the primary (see pin_primary()).
+_force_primary = contextvars.ContextVar("stocks_force_primary", default=False)
+
+
+def _replicas():
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+@contextmanager
+def pin_primary(enabled: bool = True) -> Iterator[None]:
+    """
+    Route reads inside the block to the primary (no-op when `enabled` is False).
+    """
+    token = _force_primary.set(enabled or _force_primary.get())
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+
+def mark_written(symbol: str) -> None:
+    """
+    Open a short sticky-primary window for `symbol` after a write, so the next
+    payload build (which gets cached for everyone) can't read a lagging replica.
+    Stored in the shared cache, so it applies across workers.
+    """
+    seconds = getattr(settings, "DB_STICKY_PRIMARY_SECONDS", 0)
+    if _replicas() and seconds:
+        cache.set(f"{_PIN_PREFIX}{symbol.upper()}", 1, seconds)
+
+
+def recently_written(symbol: str) -> bool:
+    if not _replicas():
+        return False
+    return cache.get(f"{_PIN_PREFIX}{symbol.upper()}") is not None
+
+
+class ReplicaRouter:
+    """
+    Send reads of the `stocks` app to a random replica (settings.DATABASE_REPLICAS)
+    and everything else — writes, other apps, reads inside a transaction or a
+    pin_primary() block — to the primary. Replicas are never migrated: they
+    receive schema changes through replication.
+    """
+    route_app_labels = {"stocks"}
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in self.route_app_labels:
+            return None
+        replicas = _replicas()
+        if not replicas or _force_primary.get() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {PRIMARY, *_replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in _replicas():
+            return False
+        return None
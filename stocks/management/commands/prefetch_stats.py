@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from stocks.services import prefetch
+
+
+class Command(BaseCommand):
+    help = (
+        "Show competitor-prefetch counters (shared across workers). hit_rate is "
+        "the share of prefetched payloads that a client requested before expiry."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="zero the counters after printing")
+
+    def handle(self, *args, **options):
+        stats = prefetch.stats()
+        self.stdout.write(f"enabled: {prefetch.ENABLED}")
+        for name in prefetch.COUNTERS:
+            self.stdout.write(f"{name}: {stats[name]}")
+        rate = stats["hit_rate"]
+        self.stdout.write("hit_rate: " + ("n/a" if rate is None else f"{rate:.1%}"))
+        if options["reset"]:
+            prefetch.reset_stats()
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from stocks.services import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Scrape MarketWatch for every known ticker and store snapshots, so API "
+        "requests are served from the DB instead of scraping inline. Run once "
+        "(cron) or with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("symbols", nargs="*", help="tickers to refresh (default: all known)")
+        parser.add_argument("--loop", action="store_true", help="keep refreshing every --interval seconds")
+        parser.add_argument("--interval", type=int, default=600)
+        parser.add_argument("--pause", type=float, default=2.0,
+                            help="seconds between tickers, to stay polite with MarketWatch")
+        parser.add_argument("--keep", type=int, default=snapshots.KEEP,
+                            help="snapshots kept per ticker")
+
+    def handle(self, *args, **options):
+        while True:
+            self._refresh_all(options)
+            if not options["loop"]:
+                return
+            close_old_connections()
+            time.sleep(options["interval"])
+
+    def _refresh_all(self, options):
+        symbols = [s.upper() for s in options["symbols"]] or snapshots.symbols_to_refresh()
+        ok = 0
+        for i, symbol in enumerate(symbols):
+            if i and options["pause"]:
+                time.sleep(options["pause"])
+            try:
+                refreshed = snapshots.refresh_snapshot(symbol)
+            except Exception as e:
+                self.stderr.write(f"{symbol}: scrape failed: {e}")
+                continue
+            if refreshed:
+                ok += 1
+                snapshots.prune_snapshots(symbol, options["keep"])
+            else:
+                self.stderr.write(f"{symbol}: no fresh data (captcha/cookie?); keeping last snapshot")
+        self.stdout.write(f"refreshed {ok}/{len(symbols)} tickers")
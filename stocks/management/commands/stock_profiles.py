@@ -0,0 +1,95 @@
+import io
+import pstats
+import datetime as dt
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from stocks import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        "List and summarize request profiles saved by stocks.profiling.ProfilingMiddleware "
+        "(STOCK_PROFILING_ENABLED=true)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--symbol", help="only profiles of this ticker")
+        parser.add_argument("--limit", type=int, default=20, help="profiles listed")
+        parser.add_argument("--show", metavar="ID", help="print the hottest functions/stacks of one profile")
+        parser.add_argument("--top", type=int, default=15, help="entries printed by --show")
+
+    def handle(self, *args, **options):
+        if options["show"]:
+            return self._show(options["show"], options["top"])
+
+        profiles = profiling.list_profiles(options["symbol"])
+        if not profiles:
+            self.stdout.write(f"no profiles in {profiling._profile_dir()}")
+            return
+
+        self.stdout.write(f"{'id':<36} {'reason':<8} {'status':>6} {'ms':>9}  stages (ms)")
+        for meta in profiles[:options["limit"]]:
+            stages = ", ".join(f"{k}={v:.0f}" for k, v in sorted(
+                meta.get("stages", {}).items(), key=lambda kv: -kv[1]))
+            self.stdout.write(
+                f"{meta['id']:<36} {meta['reason']:<8} {meta['status']:>6} "
+                f"{meta['duration_ms']:>9.1f}  {stages}"
+            )
+        self._summary(profiles)
+
+    def _summary(self, profiles):
+        """
+        Per-stage mean/max over all matching profiles, and how often each stage
+        was the slowest one.
+        """
+        per_stage = defaultdict(list)
+        dominant = Counter()
+        for meta in profiles:
+            stages = meta.get("stages") or {}
+            for name, ms in stages.items():
+                per_stage[name].append(ms)
+            if stages:
+                dominant[max(stages, key=stages.get)] += 1
+
+        durations = sorted(m["duration_ms"] for m in profiles)
+        self.stdout.write(
+            f"\n{len(profiles)} profiles; duration median {durations[len(durations) // 2]:.1f} ms, "
+            f"max {durations[-1]:.1f} ms"
+        )
+        for name, values in sorted(per_stage.items(), key=lambda kv: -sum(kv[1])):
+            self.stdout.write(
+                f"  {name:<14} mean {sum(values) / len(values):>9.1f}  max {max(values):>9.1f}  "
+                f"slowest in {dominant[name]}"
+            )
+
+    def _show(self, profile_id, top):
+        meta = next((m for m in profiling.list_profiles() if m["id"] == profile_id), None)
+        if meta is None:
+            raise CommandError(f"unknown profile {profile_id!r}")
+
+        when = dt.datetime.fromtimestamp(meta["created_at"], dt.timezone.utc).isoformat()
+        self.stdout.write(
+            f"{meta['method']} {meta['path']} -> {meta['status']} in {meta['duration_ms']:.1f} ms "
+            f"({meta['reason']}, {when})"
+        )
+        self.stdout.write(f"stages: {meta.get('stages')}\n")
+
+        path = profiling.profile_path(meta)
+        if meta["format"] == "pstats":
+            out = io.StringIO()
+            pstats.Stats(path, stream=out).sort_stats("cumulative").print_stats(top)
+            self.stdout.write(out.getvalue())
+            return
+
+        # Collapsed stacks: rank leaf frames by samples (self time).
+        leaves, total = Counter(), 0
+        with open(path) as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                leaves[stack.rsplit(";", 1)[-1]] += int(count)
+                total += int(count)
+        self.stdout.write(f"{total} samples; flame graph: flamegraph.pl {path} > flame.svg")
+        for frame, count in leaves.most_common(top):
+            self.stdout.write(f"{count / total:>6.1%}  {frame}")
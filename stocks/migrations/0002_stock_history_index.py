@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:34
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction; building it
+    # concurrently keeps inserts into stocks_stock flowing on large tables.
+    atomic = False
+
+    dependencies = [
+        ('stocks', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='stock',
+            index=models.Index(fields=['company_code', '-created_at', '-id'], include=('company_name', 'amount'), name='stock_code_created_id_idx'),
+        ),
+    ]
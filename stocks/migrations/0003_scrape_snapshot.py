@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0002_stock_history_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapeSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_code', models.CharField(max_length=20)),
+                ('performance', models.JSONField(default=dict)),
+                ('competitors', models.JSONField(default=list)),
+                ('scraped_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company_code', '-scraped_at'], name='snapshot_code_scraped_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Separate step, once stock_code_created_id_idx exists: it leads with
+    # company_code, so the single-column index is redundant.
+
+    dependencies = [
+        ('stocks', '0003_scrape_snapshot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stock',
+            name='company_code',
+            field=models.CharField(max_length=20),
+        ),
+    ]
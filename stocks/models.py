@@ -2,10 +2,42 @@ from django.db import models
 ##from decimal import Decimal
 
 class Stock(models.Model):
-    company_code = models.CharField(max_length=20, db_index=True)  # sem unique
+    company_code = models.CharField(max_length=20)  # sem unique; indexed via Meta.indexes
     company_name = models.CharField(max_length=100)  # novo campo null=True,
     amount = models.DecimalField(max_digits=18, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of a ticker's purchases and "latest name" lookups,
+            # newest first. INCLUDE makes those and the position Sum index-only
+            # scans on Postgres (other backends just get the composite index).
+            models.Index(
+                fields=["company_code", "-created_at", "-id"],
+                include=["company_name", "amount"],
+                name="stock_code_created_id_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.company_code
+
+
+class ScrapeSnapshot(models.Model):
+    """
+    A successful MarketWatch scrape for one ticker. Payloads are served from the
+    latest snapshot, so captcha pages, expired cookies or restarts don't blank
+    out performance/competitors.
+    """
+    company_code = models.CharField(max_length=20)
+    performance = models.JSONField(default=dict)
+    competitors = models.JSONField(default=list)
+    scraped_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["company_code", "-scraped_at"], name="snapshot_code_scraped_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.company_code} @ {self.scraped_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,259 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import logging
+import cProfile
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+log = logging.getLogger(__name__)
+
+_STOCK_PATH = re.compile(r"^/api/stock/(?P<symbol>[^/]+)/$")
+
+# Stage timings (ms) of the request being profiled; None when nobody is collecting.
+_timings = contextvars.ContextVar("stocks_stage_timings", default=None)
+
+
+# --- stage timings ----------------------------------------------------------
+
+def record_stage(name: str, seconds: float) -> None:
+    timings = _timings.get()
+    if timings is not None:
+        timings[name] = round(timings.get(name, 0.0) + seconds * 1000, 3)
+
+
+@contextmanager
+def stage_timer(name: str) -> Iterator[None]:
+    """
+    Add the block's wall time to stage `name` of the profiled request (no-op
+    otherwise). Stages may nest, e.g. scrape > scrape_fetch.
+    """
+    if _timings.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+@contextmanager
+def collect_stages() -> Iterator[Dict[str, float]]:
+    timings: Dict[str, float] = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+# --- stack sampler ----------------------------------------------------------
+
+def _collapse(frame) -> str:
+    """
+    Root-first "func (file:line);..." stack, the collapsed format flame graph
+    tools (flamegraph.pl, speedscope) read.
+    """
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler(threading.Thread):
+    """
+    Low-overhead wall-clock profiler: one daemon thread per process that, while
+    some request thread is being watched, snapshots its stack every `interval`
+    seconds. Cheap enough to run on every request, so slow requests can be
+    kept after the fact.
+    """
+    def __init__(self, interval: float):
+        super().__init__(name="stock-profile-sampler", daemon=True)
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._watched: Dict[int, Counter] = {}
+        self._wake = threading.Event()
+
+    def watch(self, thread_id: int) -> Counter:
+        stacks: Counter = Counter()
+        with self._lock:
+            self._watched[thread_id] = stacks
+        self._wake.set()
+        return stacks
+
+    def unwatch(self, thread_id: int) -> None:
+        with self._lock:
+            self._watched.pop(thread_id, None)
+
+    def run(self) -> None:
+        while True:
+            with self._lock:
+                watched = list(self._watched.items())
+            if not watched:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            frames = sys._current_frames()
+            for thread_id, stacks in watched:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stacks[_collapse(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+_sampler: Optional[StackSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler() -> StackSampler:
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = StackSampler(settings.STOCK_PROFILE_SAMPLE_INTERVAL_MS / 1000)
+            _sampler.start()
+        return _sampler
+
+
+# --- on-disk ring buffer ------------------------------------------------------
+
+def _profile_dir() -> str:
+    return str(settings.STOCK_PROFILE_DIR)
+
+
+def save_profile(meta: Dict[str, Any], profiler: Optional[cProfile.Profile] = None,
+                 stacks: Optional[Counter] = None) -> Dict[str, Any]:
+    """
+    Write a profile (pstats from `profiler`, or collapsed `stacks`) plus a JSON
+    sidecar with `meta`, then evict the oldest beyond STOCK_PROFILE_KEEP.
+    Files are named by time, so listing them sorted is chronological.
+    """
+    directory = _profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    profile_id = f"{int(time.time() * 1000):015d}-{meta.get('symbol', '-')}-{uuid.uuid4().hex[:6]}"
+
+    if profiler is not None:
+        meta = {**meta, "format": "pstats", "file": f"{profile_id}.prof"}
+        profiler.dump_stats(os.path.join(directory, meta["file"]))
+    else:
+        meta = {**meta, "format": "collapsed", "file": f"{profile_id}.folded"}
+        with open(os.path.join(directory, meta["file"]), "w") as f:
+            for stack, count in (stacks or Counter()).most_common():
+                f.write(f"{stack} {count}\n")
+
+    meta = {"id": profile_id, **meta}
+    tmp = os.path.join(directory, f".{profile_id}.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    # The sidecar appears last and atomically: listed profiles are complete.
+    os.replace(tmp, os.path.join(directory, f"{profile_id}.json"))
+
+    _evict(directory, settings.STOCK_PROFILE_KEEP)
+    return meta
+
+
+def _evict(directory: str, keep: int) -> None:
+    sidecars = sorted(n for n in os.listdir(directory) if n.endswith(".json"))
+    for name in sidecars[:max(0, len(sidecars) - keep)]:
+        stem = name[:-len(".json")]
+        for suffix in (".json", ".prof", ".folded"):
+            try:
+                os.remove(os.path.join(directory, stem + suffix))
+            except FileNotFoundError:  # another worker got there first
+                pass
+
+
+def list_profiles(symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Saved profiles' metadata, newest first.
+    """
+    directory = _profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted((n for n in os.listdir(directory) if n.endswith(".json")), reverse=True):
+        try:
+            with open(os.path.join(directory, name)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if symbol is None or meta.get("symbol") == symbol.upper():
+            profiles.append(meta)
+    return profiles
+
+
+def profile_path(meta: Dict[str, Any]) -> str:
+    return os.path.join(_profile_dir(), meta["file"])
+
+
+# --- middleware -------------------------------------------------------------
+
+class ProfilingMiddleware:
+    """
+    Opt-in profiling of GET/POST /api/stock/{symbol}/ (STOCK_PROFILING_ENABLED).
+
+    A random STOCK_PROFILE_SAMPLE_RATE share of requests runs under cProfile
+    and is always saved (pstats). Every other request runs under the stack
+    sampler and is saved (collapsed stacks) only if it took at least
+    STOCK_PROFILE_SLOW_MS. Each profile records the ticker, status, duration
+    and the stage timings collected via stage_timer().
+    """
+    def __init__(self, get_response):
+        if not settings.STOCK_PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        match = _STOCK_PATH.match(request.path_info)
+        if not match:
+            return self.get_response(request)
+
+        slow_ms = settings.STOCK_PROFILE_SLOW_MS
+        sampled = random.random() < settings.STOCK_PROFILE_SAMPLE_RATE
+        profiler = cProfile.Profile() if sampled else None
+        sampler = get_sampler() if (not sampled and slow_ms) else None
+        thread_id = threading.get_ident()
+        stacks = sampler.watch(thread_id) if sampler else None
+
+        with collect_stages() as stages:
+            start = time.perf_counter()
+            try:
+                if profiler is not None:
+                    profiler.enable()
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                if sampler is not None:
+                    sampler.unwatch(thread_id)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if sampled or (slow_ms and elapsed_ms >= slow_ms):
+            meta = {
+                "symbol": match["symbol"].upper(),
+                "method": request.method,
+                "path": request.get_full_path(),
+                "status": response.status_code,
+                "duration_ms": round(elapsed_ms, 3),
+                "stages": stages,
+                "reason": "sampled" if sampled else "slow",
+                "created_at": time.time(),
+            }
+            try:
+                save_profile(meta, profiler=profiler, stacks=stacks)
+            except OSError as e:
+                log.warning("Could not save request profile: %s", e)
+        return response
@@ -0,0 +1,70 @@
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .profiling import stage_timer
+
+try:  # optional dependency; falls back to the stdlib-based JSONRenderer
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+_LS, _PS = "\u2028".encode(), "\u2029".encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in JSONRenderer backed by orjson when it is installed.
+
+    Output is compact UTF-8 JSON, like DRF's default settings. Types orjson
+    doesn't know (Decimal, lazy strings, ...) go through DRF's JSONEncoder,
+    and so do dates and times, which orjson would format differently (UTC
+    as "+00:00" instead of DRF's "Z"). orjson's UUIDs already match DRF.
+    Indented output (e.g. the browsable API) uses the stdlib path.
+    """
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with stage_timer("render"):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self._encoder.default, option=_ORJSON_OPTIONS)
+        # Same strict-javascript-subset escaping as JSONRenderer
+        if _LS in ret or _PS in ret:
+            ret = ret.replace(_LS, b"\\u2028").replace(_PS, b"\\u2029")
+        return ret
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets text/event-stream clients through content negotiation. The stream
+    itself is written by the view; this only renders one-off responses
+    (e.g. validation errors) as a single SSE "error" event.
+    """
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return format_sse({"event": "error", "data": data}).encode()
+
+
+def format_sse(event) -> str:
+    """
+    {"event": ..., "data": ..., "id": ...} -> one SSE frame.
+    """
+    lines = []
+    if event.get("id") is not None:
+        lines.append(f"id: {event['id']}")
+    if event.get("event"):
+        lines.append(f"event: {event['event']}")
+    lines.append("data: " + FastJSONRenderer().render(event.get("data")).decode())
+    return "\n".join(lines) + "\n\n"
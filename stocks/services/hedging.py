@@ -0,0 +1,214 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Set, TypeVar
+
+import requests
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Send a duplicate request when the first one is slower than the endpoint's p95
+HEDGE_ENABLED = os.getenv("POLYGON_HEDGE_ENABLED", "true").lower() in ("1", "true", "yes")
+HEDGE_QUANTILE = float(os.getenv("POLYGON_HEDGE_QUANTILE", "0.95"))
+HEDGE_MIN_DELAY = float(os.getenv("POLYGON_HEDGE_MIN_DELAY_SECONDS", "0.05"))
+# Upper bound on hedged requests / requests, so a slow upstream isn't hit twice as hard
+HEDGE_BUDGET = float(os.getenv("POLYGON_HEDGE_BUDGET", "0.1"))
+
+# Derive the timeout from observed latency: p99 × multiplier, within [min, client timeout]
+ADAPTIVE_TIMEOUT = os.getenv("POLYGON_ADAPTIVE_TIMEOUT", "true").lower() in ("1", "true", "yes")
+TIMEOUT_MULTIPLIER = float(os.getenv("POLYGON_TIMEOUT_MULTIPLIER", "3"))
+MIN_TIMEOUT = float(os.getenv("POLYGON_MIN_TIMEOUT_SECONDS", "1"))
+
+# Rolling window per endpoint; below MIN_SAMPLES we neither hedge nor adapt
+WINDOW = int(os.getenv("POLYGON_LATENCY_WINDOW", "200"))
+MIN_SAMPLES = int(os.getenv("POLYGON_LATENCY_MIN_SAMPLES", "20"))
+MAX_WORKERS = int(os.getenv("POLYGON_MAX_WORKERS", "16"))
+
+COUNTERS = ("requests", "hedged", "hedge_wins", "timeouts", "errors", "pool_full")
+
+
+class EndpointLatency:
+    """
+    Latencies of the last `window` attempts against one endpoint, measured
+    from submission (so time queued for a pool thread counts; a timeout
+    counts as at least the timeout it hit), plus counters. Per process.
+    """
+    def __init__(self, window: int = WINDOW):
+        self._samples: "deque[float]" = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def timeout(self, default: float) -> float:
+        p99 = self.quantile(0.99) if ADAPTIVE_TIMEOUT else None
+        if p99 is None:
+            return default
+        return min(default, max(MIN_TIMEOUT, p99 * TIMEOUT_MULTIPLIER))
+
+    def hedge_delay(self, timeout: float) -> Optional[float]:
+        """
+        How long to wait for the first attempt before hedging; None = don't hedge.
+        """
+        threshold = self.quantile(HEDGE_QUANTILE) if HEDGE_ENABLED else None
+        if threshold is None:
+            return None
+        delay = max(HEDGE_MIN_DELAY, threshold)
+        return delay if delay < timeout else None
+
+    def within_budget(self) -> bool:
+        with self._lock:
+            return self.counters["hedged"] < HEDGE_BUDGET * self.counters["requests"]
+
+    def snapshot(self, default_timeout: float) -> Dict[str, Any]:
+        def ms(value):
+            return None if value is None else round(value * 1000, 1)
+
+        timeout = self.timeout(default_timeout)
+        with self._lock:
+            samples, counters = len(self._samples), dict(self.counters)
+        return {
+            "samples": samples,
+            "p50_ms": ms(self.quantile(0.5)),
+            "p95_ms": ms(self.quantile(0.95)),
+            "p99_ms": ms(self.quantile(0.99)),
+            "timeout_ms": ms(timeout),
+            "hedge_delay_ms": ms(self.hedge_delay(timeout)),
+            **counters,
+        }
+
+
+_latencies: Dict[str, EndpointLatency] = {}
+_latencies_lock = threading.Lock()
+
+
+def latency(endpoint: str) -> EndpointLatency:
+    with _latencies_lock:
+        if endpoint not in _latencies:
+            _latencies[endpoint] = EndpointLatency()
+        return _latencies[endpoint]
+
+
+def snapshot(default_timeout: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Metrics of every endpoint seen by this process.
+    """
+    with _latencies_lock:
+        endpoints = dict(_latencies)
+    return {
+        "hedge_enabled": HEDGE_ENABLED,
+        "adaptive_timeout": ADAPTIVE_TIMEOUT,
+        "endpoints": {name: lat.snapshot(default_timeout) for name, lat in sorted(endpoints.items())},
+    }
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_inflight = 0
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # Created on first use, i.e. after gunicorn has forked the worker
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="polygon")
+        return _executor
+
+
+def _has_idle_worker() -> bool:
+    # Attempts count from submission, so a full pool means new ones would queue.
+    with _executor_lock:
+        return _inflight < MAX_WORKERS
+
+
+def hedged_call(endpoint: str, send: Callable[[float], T], default_timeout: float,
+                is_final: Callable[[T], bool] = lambda result: True) -> T:
+    """
+    Call `send(timeout)` with an adaptive timeout, hedging it when slow.
+
+    Once `endpoint` has enough history, the first attempt runs on a small
+    thread pool; if it hasn't finished by the endpoint's p95, an identical
+    second attempt is sent and whichever returns a final result first wins
+    (`is_final` tells e.g. a 5xx apart, so the other attempt can still
+    succeed). The losing attempt is left to finish on its own. Without
+    history, or while every pool thread is busy (losing hedges still
+    running), `send` simply runs in the calling thread.
+    """
+    lat = latency(endpoint)
+    lat.incr("requests")
+    timeout = lat.timeout(default_timeout)
+
+    def attempt(submitted: float, pooled: bool) -> T:
+        global _inflight
+        try:
+            result = send(timeout)
+        except requests.Timeout:
+            lat.observe(max(timeout, time.perf_counter() - submitted))
+            lat.incr("timeouts")
+            raise
+        except Exception:
+            lat.incr("errors")
+            raise
+        finally:
+            if pooled:
+                with _executor_lock:
+                    _inflight -= 1
+        lat.observe(time.perf_counter() - submitted)
+        if not is_final(result):
+            lat.incr("errors")
+        return result
+
+    def submit() -> Future:
+        global _inflight
+        with _executor_lock:
+            _inflight += 1
+        return executor.submit(attempt, time.perf_counter(), True)
+
+    delay = lat.hedge_delay(timeout)
+    if delay is None:
+        return attempt(time.perf_counter(), False)
+    if not _has_idle_worker():
+        lat.incr("pool_full")
+        return attempt(time.perf_counter(), False)
+
+    executor = _get_executor()
+    first = submit()
+    pending: Set[Future] = {first}
+    hedge: Optional[Future] = None
+    done, _ = wait(pending, timeout=delay)
+    if not done and lat.within_budget() and _has_idle_worker():
+        lat.incr("hedged")
+        hedge = submit()
+        pending.add(hedge)
+        log.debug("Hedging %s after %.0f ms", endpoint, delay * 1000)
+
+    last = first
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            last = future
+            if future.exception() is None and is_final(future.result()):
+                if future is hedge:
+                    lat.incr("hedge_wins")
+                return future.result()
+    # Neither attempt gave a final answer: surface the last one as-is.
+    return last.result()
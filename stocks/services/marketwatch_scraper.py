@@ -1,7 +1,9 @@
-import os, logging, re, requests
+import os, logging, re, time, requests
 from bs4 import BeautifulSoup
 from typing import Dict, List, Tuple, Optional
 
+from ..profiling import record_stage, stage_timer
+
 log = logging.getLogger(__name__)
 
 # Mapping of MarketWatch performance labels to our internal keys
@@ -16,6 +18,9 @@ _LABEL_TO_KEY = {
 # COOKIE from .app.env file change if necessary
 COOKIE = os.getenv("MARKETWATCH_COOKIE", "")
 
+# Competitor rows link to their quote page; foreign listings carry ?countrycode=xx
+_QUOTE_LINK = re.compile(r"/investing/stock/(?P<sym>[a-z0-9.\-]+)(?P<query>\?[^#]*)?", re.I)
+
 def _headers(cookie: str) -> dict:
     return {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:141.0) Gecko/20100101 Firefox/141.0",
@@ -62,22 +67,44 @@ def _parse_market_cap(txt: str) -> Tuple[Optional[str], Optional[float]]:
 
     return cur, value
 
+def _competitor_symbol(href: str) -> Optional[str]:
+    """
+    US ticker from a competitor's quote link, or None (no link, foreign listing).
+    """
+    m = _QUOTE_LINK.search(href or "")
+    if not m:
+        return None
+    country = re.search(r"countrycode=(\w+)", m.group("query") or "", flags=re.I)
+    if country and country.group(1).lower() != "us":
+        return None
+    return m.group("sym").upper()
+
+
 def get_scrapping_data(symbol: str):
     """
     Get html from MarketWatch and parse performance and competitors data.
+
+    "ok" is False when the page couldn't be fetched or was the antibot/captcha
+    page; performance/competitors then hold the empty defaults.
     """
 
     performance = {v: None for v in _LABEL_TO_KEY.values()}
     competitors = []
 
     url = f"https://www.marketwatch.com/investing/stock/{symbol.lower()}"
-    html = requests.get(url, headers=_headers(COOKIE), timeout=10).text
+    try:
+        with stage_timer("scrape_fetch"):
+            html = requests.get(url, headers=_headers(COOKIE), timeout=10).text
+    except requests.RequestException as e:
+        log.warning("MarketWatch request failed for %s: %s", symbol, e)
+        return {"ok": False, "performance": performance, "competitors": competitors}
 
    # Check for bot/captcha page
     if ("Please enable JS and disable any ad blocker" in html or "captcha-delivery.com" in html or "datadome" in html.lower()):
         log.error("MarketWatch antibot/captcha detectado. Atualize MARKETWATCH_COOKIE no .app.env.")
-        return {"performance": performance, "competitors": competitors}
+        return {"ok": False, "performance": performance, "competitors": competitors}
 
+    parse_started = time.perf_counter()
     soup = BeautifulSoup(html, "lxml")
 
     # Find performance box
@@ -124,11 +151,14 @@ def get_scrapping_data(symbol: str):
             name = tds[0].get_text(" ", strip=True)
             cap_txt = tds[-1].get_text(" ", strip=True) if len(tds) >= 3 else ""
             currency, value = _parse_market_cap(cap_txt)
+            link = tds[0].find("a", href=True)
             if name:
                 competitors.append({
                     "name": name,
+                    "symbol": _competitor_symbol(link["href"]) if link else None,
                     "market_cap": {"currency": currency, "value": value}
                 })
 
-    return {"performance": performance, "competitors": competitors}
+    record_stage("scrape_parse", time.perf_counter() - parse_started)
+    return {"ok": True, "performance": performance, "competitors": competitors}
 
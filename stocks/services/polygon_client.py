@@ -3,11 +3,25 @@ import datetime as dt
 from zoneinfo import ZoneInfo
 from typing import Optional, Dict
 
+from . import hedging
+
 log = logging.getLogger(__name__)
 
+ET = ZoneInfo("America/New_York")
+MARKET_OPEN = dt.time(9, 30)
+CLOSE_CUTOFF = dt.time(16, 10)  # small buffer after the 16:00 ET close
+
+def _is_final(response: requests.Response) -> bool:
+    # 4xx is an answer (bad ticker, no data that day); 5xx is worth a hedge
+    return response.status_code < 500
+
+
 class PolygonClient:
     """
     Thin HTTP client for Polygon.io used by our services layer.
+
+    Requests go through hedging.hedged_call: `timeout` is the ceiling for the
+    adaptive per-endpoint timeout, and slow requests get a hedged duplicate.
     """
     BASE_URL = os.getenv("POLYGON_BASE_URL")
 
@@ -15,6 +29,14 @@ class PolygonClient:
         self.api_key = api_key or os.getenv("POLYGON_API_KEY", "")
         self.timeout = timeout
 
+    def _get(self, endpoint: str, url: str, **kwargs) -> requests.Response:
+        return hedging.hedged_call(
+            endpoint,
+            lambda timeout: requests.get(url, timeout=timeout, **kwargs),
+            self.timeout,
+            is_final=_is_final,
+        )
+
     @staticmethod
     def last_trading_day() -> dt.date:
         """
@@ -24,21 +46,60 @@ class PolygonClient:
         (Holidays/early-closes aren't handled here.)
         """
         now_utc = dt.datetime.now(dt.timezone.utc)
-        now_et = now_utc.astimezone(ZoneInfo("America/New_York"))
+        now_et = now_utc.astimezone(ET)
         d = now_et.date()
 
         # If weekend, go back to Friday
         while d.weekday() >= 5:  # 5=Sat, 6=Sun
             d -= dt.timedelta(days=1)
 
-        cutoff = dt.time(16, 10)  # small buffer after the 16:00 ET close
         # If still the same weekday as 'today' but before cutoff -> go to previous weekday
-        if d == now_et.date() and now_et.time() < cutoff:
+        if d == now_et.date() and now_et.time() < CLOSE_CUTOFF:
             d -= dt.timedelta(days=1)
             while d.weekday() >= 5:
                 d -= dt.timedelta(days=1)
         return d
 
+    @staticmethod
+    def is_market_open() -> bool:
+        """
+        True on weekdays between the 09:30 ET open and the 16:10 ET cutoff.
+        (Holidays/early-closes aren't handled here.)
+        """
+        now_et = dt.datetime.now(dt.timezone.utc).astimezone(ET)
+        return now_et.weekday() < 5 and MARKET_OPEN <= now_et.time() < CLOSE_CUTOFF
+
+    @staticmethod
+    def _seconds_until_next(at: dt.time) -> float:
+        """
+        Seconds until the next weekday `at` ET (today's, if not reached yet).
+        """
+        now_utc = dt.datetime.now(dt.timezone.utc)
+        now_et = now_utc.astimezone(ET)
+        d = now_et.date()
+        if d.weekday() >= 5 or now_et.time() >= at:
+            d += dt.timedelta(days=1)
+            while d.weekday() >= 5:
+                d += dt.timedelta(days=1)
+        target = dt.datetime.combine(d, at, tzinfo=ET)
+        # Compare in UTC: same-tzinfo arithmetic would ignore a DST change in between.
+        return (target.astimezone(dt.timezone.utc) - now_utc).total_seconds()
+
+    @staticmethod
+    def seconds_until_rollover() -> float:
+        """
+        Seconds until last_trading_day() next changes, i.e. until the next
+        weekday's 16:10 ET cutoff (today's, if we haven't reached it yet).
+        """
+        return PolygonClient._seconds_until_next(CLOSE_CUTOFF)
+
+    @staticmethod
+    def seconds_until_open() -> float:
+        """
+        Seconds until the next weekday's 09:30 ET open (today's, if not reached yet).
+        """
+        return PolygonClient._seconds_until_next(MARKET_OPEN)
+
     def get_company_info(self, symbol: str) -> Optional[Dict[str, str]]:
         """
         Resolve the company name for a given ticker using /v3/reference/tickers.
@@ -55,7 +116,7 @@ class PolygonClient:
         }
 
         try:
-            r = requests.get(url, params=params, timeout=self.timeout)
+            r = self._get("reference/tickers", url, params=params)
             r.raise_for_status()
             j = r.json()
 
@@ -83,7 +144,7 @@ class PolygonClient:
         headers = {"Authorization": f"Bearer {self.api_key}", "Accept": "application/json"}
 
         try:
-            r = requests.get(url, headers=headers, timeout=self.timeout)
+            r = self._get("open-close", url, headers=headers)
             r.raise_for_status()
             j = r.json()
 
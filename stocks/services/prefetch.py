@@ -0,0 +1,251 @@
+import os
+import time
+import queue
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import close_old_connections
+
+log = logging.getLogger(__name__)
+
+# Off by default: every prefetch spends Polygon/MarketWatch quota on a guess.
+ENABLED = os.getenv("STOCK_PREFETCH_ENABLED", "false").lower() in ("1", "true", "yes")
+QUEUE_SIZE = int(os.getenv("STOCK_PREFETCH_QUEUE_SIZE", "20"))
+# Upstream builds per minute per process (0 = unlimited)
+RATE_PER_MINUTE = float(os.getenv("STOCK_PREFETCH_RATE_PER_MINUTE", "4"))
+# A ticker is prefetched at most once per cooldown, across workers
+COOLDOWN_SECONDS = int(os.getenv("STOCK_PREFETCH_COOLDOWN_SECONDS", "900"))
+# Competitors considered per scraped ticker (MarketWatch lists them by relevance)
+MAX_PER_SYMBOL = int(os.getenv("STOCK_PREFETCH_MAX_PER_SYMBOL", "5"))
+
+_COOLDOWN_PREFIX = "prefetch:cooldown:"
+_WARM_PREFIX = "prefetch:warm:"
+_STAT_PREFIX = "prefetch:stat:"
+COUNTERS = ("offered", "queued", "dropped", "cooldown", "cached", "fetched", "failed", "hits")
+
+# True while the prefetch worker builds a payload: no prefetch cascades, no self-hits.
+_prefetching = contextvars.ContextVar("stocks_prefetching", default=False)
+# True for payload reads made on nobody's behalf (stream pollers): not client hits.
+_background = contextvars.ContextVar("stocks_background_read", default=False)
+
+# Tickers this process prefetched and that no client has hit yet, with the
+# monotonic time their warm marker expires. Payload cache hits check this
+# before touching the shared cache, so ordinary hits cost no round-trip.
+_warmed: Dict[str, float] = {}
+_warmed_lock = threading.Lock()
+
+Fetch = Callable[[str], Tuple[Dict[str, Any], int]]
+
+
+def _default_fetch(symbol: str) -> Tuple[Dict[str, Any], int]:
+    # Looked up at call time so tests can patch stock_service.get_payload_cached
+    from . import stock_service
+    return stock_service.get_payload_cached(symbol)
+
+
+def _is_cached(symbol: str) -> bool:
+    from . import stock_service
+    return stock_service.cache.get(stock_service._cache_key(symbol)) is not None
+
+
+def _incr(name: str) -> None:
+    """
+    Bump a counter in the shared cache, so stats add up across workers.
+    """
+    key = f"{_STAT_PREFIX}{name}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def stats() -> Dict[str, Any]:
+    """
+    Counters plus hit_rate: the share of prefetched payloads a client
+    actually requested before they expired.
+    """
+    values = cache.get_many([f"{_STAT_PREFIX}{name}" for name in COUNTERS])
+    counters = {name: values.get(f"{_STAT_PREFIX}{name}", 0) for name in COUNTERS}
+    counters["hit_rate"] = (counters["hits"] / counters["fetched"]) if counters["fetched"] else None
+    return counters
+
+
+def reset_stats() -> None:
+    cache.delete_many([f"{_STAT_PREFIX}{name}" for name in COUNTERS])
+
+
+@contextmanager
+def background_reads() -> Iterator[None]:
+    """
+    Payload reads inside the block are not counted as client hits.
+    """
+    token = _background.set(True)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+def _mark_warmed(symbol: str, ttl: float) -> None:
+    now = time.monotonic()
+    with _warmed_lock:
+        for stale in [s for s, expires in _warmed.items() if expires <= now]:
+            del _warmed[stale]
+        _warmed[symbol] = now + ttl
+
+
+def record_hit(symbol: str) -> None:
+    """
+    Called on payload cache hits: the first client hit on a prefetched ticker
+    counts. Only the process that prefetched it knows, so hits served by
+    other workers are missed and hit_rate is a lower bound.
+    """
+    if not ENABLED or _prefetching.get() or _background.get():
+        return
+    symbol = symbol.upper()
+    with _warmed_lock:
+        expires = _warmed.pop(symbol, None)
+    if expires is None or expires <= time.monotonic():
+        return
+    if cache.delete(f"{_WARM_PREFIX}{symbol}"):
+        _incr("hits")
+
+
+class Prefetcher:
+    """
+    Warms the payload cache for tickers users are likely to open next.
+
+    A single daemon thread drains a bounded queue at no more than
+    `rate_per_minute` builds. Offers are dropped (not queued) when the queue is
+    full, the payload is already cached, or the ticker is in its cooldown.
+    """
+    def __init__(self, fetch: Fetch = _default_fetch, queue_size: int = QUEUE_SIZE,
+                 rate_per_minute: float = RATE_PER_MINUTE, cooldown: int = COOLDOWN_SECONDS,
+                 autostart: bool = True):
+        self.fetch = fetch
+        self.cooldown = cooldown
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self.autostart = autostart
+        self.queue: "queue.Queue[str]" = queue.Queue(maxsize=queue_size)
+        self._next_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def offer(self, symbols: Iterable[Optional[str]], source: Optional[str] = None) -> List[str]:
+        """
+        Queue what is worth prefetching among `symbols`; returns the queued tickers.
+        """
+        source = (source or "").upper()
+        candidates = []
+        for symbol in symbols:
+            symbol = (symbol or "").upper()
+            if symbol and symbol != source and symbol not in candidates:
+                candidates.append(symbol)
+
+        queued = []
+        for symbol in candidates[:MAX_PER_SYMBOL]:
+            _incr("offered")
+            if _is_cached(symbol):
+                _incr("cached")
+                continue
+            cooldown_key = f"{_COOLDOWN_PREFIX}{symbol}"
+            if not cache.add(cooldown_key, 1, self.cooldown):
+                _incr("cooldown")
+                continue
+            try:
+                self.queue.put_nowait(symbol)
+            except queue.Full:
+                # Not attempted, so it may be offered again right away.
+                cache.delete(cooldown_key)
+                _incr("dropped")
+                continue
+            _incr("queued")
+            queued.append(symbol)
+
+        if queued and self.autostart:
+            self._ensure_started()
+        return queued
+
+    def delay(self) -> float:
+        """
+        Seconds until the rate limit allows the next build.
+        """
+        return max(0.0, self._next_at - time.monotonic())
+
+    def process_next(self, timeout: Optional[float] = None) -> bool:
+        """
+        Build one queued ticker (waiting for the rate limit first). Returns
+        False if the queue stayed empty for `timeout` seconds.
+        """
+        try:
+            symbol = self.queue.get(timeout=timeout) if timeout else self.queue.get_nowait()
+        except queue.Empty:
+            return False
+
+        if self._stop_event.wait(self.delay()):
+            return False
+        self._next_at = time.monotonic() + self.interval
+
+        token = _prefetching.set(True)
+        try:
+            data, http_status = self.fetch(symbol)
+        except Exception as e:
+            log.warning("Prefetch of %s failed: %s", symbol, e)
+            data, http_status = {}, 500
+        finally:
+            _prefetching.reset(token)
+
+        if http_status == 200:
+            _incr("fetched")
+            ttl = data.remaining_ttl() if hasattr(data, "remaining_ttl") else 0
+            cache.set(f"{_WARM_PREFIX}{symbol}", 1, ttl or self.cooldown)
+            _mark_warmed(symbol, ttl or self.cooldown)
+        else:
+            _incr("failed")
+        return True
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="stock-prefetch", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            if self.process_next(timeout=1.0):
+                close_old_connections()
+
+
+_prefetcher: Optional[Prefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> Prefetcher:
+    """
+    Process-wide prefetcher, created on first use.
+    """
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = Prefetcher()
+        return _prefetcher
+
+
+def offer_competitors(symbol: str, competitors: Optional[List[Dict[str, Any]]]) -> List[str]:
+    """
+    Offer the tickers of a scraped competitor list (entries without a US
+    ticker are skipped). No-op when disabled or inside a prefetch build.
+    """
+    if not ENABLED or _prefetching.get() or not competitors:
+        return []
+    symbols = [c.get("symbol") for c in competitors if isinstance(c, dict)]
+    return get_prefetcher().offer(symbols, source=symbol)
@@ -0,0 +1,81 @@
+import base64
+import datetime as dt
+from typing import Any, Dict, Optional, Tuple
+
+from django.db.models import Q
+
+from ..db_router import pin_primary, recently_written
+from ..models import Stock
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at: dt.datetime, pk: int) -> str:
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[dt.datetime, int]:
+    """
+    Inverse of encode_cursor. Raises ValueError on anything malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return dt.datetime.fromisoformat(created_at), int(pk)
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+
+
+def list_purchases(symbol: str, cursor: Optional[str] = None,
+                   limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    One page of purchases for `symbol`, newest first.
+
+    Keyset pagination over (company_code, created_at, id): the cursor holds the
+    last row's (created_at, id) and the next page seeks past it on the
+    composite index, so every page costs the same however deep it is (no
+    OFFSET scan). Raises ValueError for a bad cursor.
+
+    The OR alone can't bound an index range, so `created_at <= c` is added
+    next to it: Postgres seeks on (company_code, created_at) and only checks
+    the id tiebreaker as a filter on the rows sharing `c`.
+
+    Right after a purchase of `symbol` the page is read from the primary, so
+    the new row shows up even if the replica lags (see db_router).
+    """
+    symbol = symbol.upper()
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    qs = Stock.objects.filter(company_code=symbol)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        qs = qs.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk),
+            created_at__lte=created_at,
+        )
+
+    # One extra row tells us whether there is a next page.
+    with pin_primary(recently_written(symbol)):
+        rows = list(
+            qs.order_by("-created_at", "-id")
+            .values("id", "company_name", "amount", "created_at")[:limit + 1]
+        )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "status": "ok",
+        "company_code": symbol,
+        "results": [
+            {
+                "id": r["id"],
+                "company_name": r["company_name"],
+                "amount": float(r["amount"]),
+                "created_at": r["created_at"].isoformat(),
+            }
+            for r in rows
+        ],
+        "next_cursor": encode_cursor(rows[-1]["created_at"], rows[-1]["id"]) if has_more else None,
+    }
@@ -0,0 +1,299 @@
+import os
+import re
+import time
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.db import close_old_connections, connections
+
+from ..renderers import format_sse
+
+log = logging.getLogger(__name__)
+
+POLL_SECONDS = float(os.getenv("STREAM_POLL_SECONDS", "5"))
+HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+# Connections are recycled after this long; EventSource reconnects on its own.
+MAX_STREAM_SECONDS = float(os.getenv("STREAM_MAX_SECONDS", "300"))
+MAX_SYMBOLS = int(os.getenv("STREAM_MAX_SYMBOLS", "20"))
+# Open streams per process; each holds a worker thread, so keep this below
+# GUNICORN_THREADS or streams starve the rest of the API (0 = unlimited).
+# This is the feature's scaling ceiling on sync workers: workers × this.
+MAX_OPEN_STREAMS = int(os.getenv("STREAM_MAX_OPEN", "2"))
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# US tickers plus share classes / preferreds (BRK.B, BF-B); anything else is
+# rejected before it can start a poller.
+_SYMBOL = re.compile(r"^[A-Z][A-Z0-9.\-]{0,9}$")
+
+Fetch = Callable[[str], Tuple[Dict[str, Any], int]]
+
+
+def _default_fetch(symbol: str) -> Tuple[Dict[str, Any], int]:
+    # Looked up at call time so tests can patch stock_service.get_payload_cached
+    from . import prefetch, stock_service
+    with prefetch.background_reads():
+        return stock_service.get_payload_cached(symbol)
+
+
+def is_valid_symbol(symbol: str) -> bool:
+    return bool(_SYMBOL.match(symbol))
+
+
+def changed_fields(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fields of `new` that differ from `old`. Nested dicts (stock_values,
+    performance_data) are diffed one level down; lists are sent whole.
+    """
+    changes = {}
+    for key, value in new.items():
+        before = old.get(key)
+        if value == before:
+            continue
+        if isinstance(value, dict) and isinstance(before, dict):
+            changes[key] = {k: v for k, v in value.items() if before.get(k) != v}
+        else:
+            changes[key] = value
+    return changes
+
+
+class Subscription:
+    """
+    One client's view of the hub: a bounded queue of events for its symbols.
+    A subscriber that can't keep up is closed (it reconnects and gets fresh
+    snapshots) rather than slowing down the pollers.
+    """
+    def __init__(self, symbols: Iterable[str]):
+        self.symbols: Set[str] = set(symbols)
+        self.events: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.closed = False
+
+    def put(self, event: Dict[str, Any]) -> None:
+        if self.closed:
+            return
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            log.warning("Quote stream subscriber too slow; closing (symbols=%s).", sorted(self.symbols))
+            self.closed = True
+
+    def get(self, timeout: float) -> Dict[str, Any]:
+        return self.events.get(timeout=timeout)
+
+
+class SymbolPoller(threading.Thread):
+    """
+    Shared poller for one ticker. Reads through the payload cache (so it costs
+    at most one upstream refresh per cache TTL) and broadcasts only what changed
+    since the previous poll. Errors aren't cached, so a client error (unknown
+    ticker) stops the poller instead of asking Polygon again every interval.
+    """
+    def __init__(self, hub: "QuoteHub", symbol: str):
+        super().__init__(name=f"quote-poller-{symbol}", daemon=True)
+        self.hub = hub
+        self.symbol = symbol
+        self.state: Optional[Dict[str, Any]] = None
+        self.error: Optional[Dict[str, Any]] = None
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def run(self) -> None:
+        # Polls query the DB (position, snapshot) from this thread's own
+        # connection, so recycle it like a request would and close it on exit.
+        try:
+            while not self._stop_event.is_set():
+                close_old_connections()
+                self.poll_once()
+                self._stop_event.wait(self.hub.interval)
+        finally:
+            connections.close_all()
+
+    def poll_once(self) -> None:
+        try:
+            data, http_status = self.hub.fetch(self.symbol)
+        except Exception as e:
+            log.exception("Quote poll failed for %s: %s", self.symbol, e)
+            data, http_status = {"status": "error", "error": "internal error"}, 500
+
+        if http_status != 200:
+            error = {"symbol": self.symbol, "status": http_status, "error": data.get("error")}
+            if error != self.error:
+                self.error = error
+                self.hub.broadcast(self.symbol, {"event": "error", "data": error})
+            if 400 <= http_status < 500:
+                log.info("Stopped quote poller for %s after a %s.", self.symbol, http_status)
+                self.stop()
+            return
+
+        self.error = None
+        data = dict(data)
+        if self.state is None:
+            self.state = data
+            self.hub.broadcast(self.symbol, self.snapshot())
+            return
+
+        changes = changed_fields(self.state, data)
+        self.state = data
+        if changes:
+            self.hub.broadcast(self.symbol, {
+                "event": "update", "data": {"symbol": self.symbol, "changes": changes},
+            })
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"event": "snapshot", "data": {"symbol": self.symbol, "payload": self.state}}
+
+
+class QuoteHub:
+    """
+    Fan-out of quote updates: one SymbolPoller per ticker, shared by every
+    subscriber in this process. Pollers start with the first subscriber of a
+    symbol and stop when the last one leaves.
+    """
+    def __init__(self, fetch: Fetch = _default_fetch, interval: float = POLL_SECONDS,
+                 autostart: bool = True):
+        self.fetch = fetch
+        self.interval = interval
+        self.autostart = autostart
+        self._lock = threading.Lock()
+        self._pollers: Dict[str, SymbolPoller] = {}
+        self._subscribers: Dict[str, List[Subscription]] = {}
+
+    def subscribe(self, symbols: Iterable[str]) -> Subscription:
+        sub = Subscription(s.upper() for s in symbols)
+        to_start = []
+        with self._lock:
+            for symbol in sub.symbols:
+                self._subscribers.setdefault(symbol, []).append(sub)
+                poller = self._pollers.get(symbol)
+                if poller is None:
+                    poller = self._pollers[symbol] = SymbolPoller(self, symbol)
+                    to_start.append(poller)
+                elif poller.error is not None:
+                    sub.put({"event": "error", "data": poller.error})
+                elif poller.state is not None:
+                    # Late joiner: send what everyone else already has.
+                    sub.put(poller.snapshot())
+        if self.autostart:
+            for poller in to_start:
+                poller.start()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        sub.closed = True
+        with self._lock:
+            for symbol in sub.symbols:
+                subs = self._subscribers.get(symbol, [])
+                if sub in subs:
+                    subs.remove(sub)
+                if not subs:
+                    self._subscribers.pop(symbol, None)
+                    poller = self._pollers.pop(symbol, None)
+                    if poller is not None:
+                        poller.stop()
+
+    def broadcast(self, symbol: str, event: Dict[str, Any]) -> None:
+        with self._lock:
+            subs = list(self._subscribers.get(symbol, []))
+        for sub in subs:
+            sub.put(event)
+
+    def active_symbols(self) -> List[str]:
+        with self._lock:
+            return sorted(self._pollers)
+
+
+def stream_events(hub: QuoteHub, sub: Subscription,
+                  heartbeat: float = HEARTBEAT_SECONDS,
+                  max_seconds: float = MAX_STREAM_SECONDS) -> Iterator[str]:
+    """
+    SSE frames for one subscriber. Heartbeat comments keep proxies from timing
+    out idle connections; the subscription is always released when the client
+    goes away (the response closes this generator).
+    """
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield "retry: 3000\n\n"
+        while not sub.closed and time.monotonic() < deadline:
+            try:
+                event = sub.get(timeout=min(heartbeat, max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event)
+    finally:
+        hub.unsubscribe(sub)
+
+
+class EventStream:
+    """
+    StreamingHttpResponse body for one client.
+
+    The hub subscription is only made once the body is iterated, so a
+    response closed before it starts streaming leaves no poller behind.
+    close() (called by Django when the response is closed) releases the
+    subscription and runs `on_close`, e.g. to free the stream slot; it is
+    idempotent.
+    """
+    def __init__(self, hub: QuoteHub, symbols: Iterable[str],
+                 on_close: Optional[Callable[[], None]] = None, **options):
+        self.hub = hub
+        self.symbols = list(symbols)
+        self.on_close = on_close
+        self.options = options
+        self._sub: Optional[Subscription] = None
+        self._closed = False
+
+    def __iter__(self) -> Iterator[str]:
+        if self._closed:
+            return
+        self._sub = self.hub.subscribe(self.symbols)
+        yield from stream_events(self.hub, self._sub, **self.options)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._sub is not None:
+            self.hub.unsubscribe(self._sub)
+        if self.on_close is not None:
+            self.on_close()
+
+
+_open_streams = 0
+_open_streams_lock = threading.Lock()
+
+
+def acquire_stream_slot() -> bool:
+    """
+    Reserve one of this process's MAX_OPEN_STREAMS; False when all are taken.
+    """
+    global _open_streams
+    with _open_streams_lock:
+        if MAX_OPEN_STREAMS and _open_streams >= MAX_OPEN_STREAMS:
+            return False
+        _open_streams += 1
+        return True
+
+
+def release_stream_slot() -> None:
+    global _open_streams
+    with _open_streams_lock:
+        _open_streams = max(0, _open_streams - 1)
+
+
+_hub: Optional[QuoteHub] = None
+_hub_lock = threading.Lock()
+
+
+def get_quote_hub() -> QuoteHub:
+    """
+    Process-wide hub, created on first use.
+    """
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = QuoteHub()
+        return _hub
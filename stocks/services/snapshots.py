@@ -0,0 +1,85 @@
+import os
+import logging
+import datetime as dt
+from typing import Any, Dict, List, Optional
+
+from django.utils import timezone
+
+from ..models import Stock, ScrapeSnapshot
+
+log = logging.getLogger(__name__)
+
+# Snapshots older than this are still served, but logged: refresh_scrapes
+# should have replaced them by now.
+MAX_AGE = int(os.getenv("SCRAPE_SNAPSHOT_MAX_AGE_SECONDS", "900"))
+# Scrape inline for a ticker with no snapshot at all (cold start). Stale
+# snapshots are never scraped inline.
+INLINE_ON_COLD_START = os.getenv("SCRAPE_INLINE_ON_COLD_START", "true").lower() in ("1", "true", "yes")
+# Snapshots kept per ticker when pruning
+KEEP = int(os.getenv("SCRAPE_SNAPSHOT_KEEP", "48"))
+
+
+def latest_snapshot(symbol: str) -> Optional[ScrapeSnapshot]:
+    return (
+        ScrapeSnapshot.objects
+        .filter(company_code=symbol.upper())
+        .order_by("-scraped_at")
+        .first()
+    )
+
+
+def snapshot_age(snapshot: ScrapeSnapshot) -> float:
+    return (timezone.now() - snapshot.scraped_at).total_seconds()
+
+
+def save_snapshot(symbol: str, scrap: Dict[str, Any]) -> Optional[ScrapeSnapshot]:
+    """
+    Persist a scrape result. Failed scrapes (captcha, network) are not saved,
+    so they can't shadow the last good snapshot.
+    """
+    if not scrap.get("ok", True):
+        return None
+    return ScrapeSnapshot.objects.create(
+        company_code=symbol.upper(),
+        performance=scrap.get("performance") or {},
+        competitors=scrap.get("competitors") or [],
+    )
+
+
+def refresh_snapshot(symbol: str) -> bool:
+    """
+    Scrape `symbol` now and store the result. Returns True on success.
+    """
+    from .marketwatch_scraper import get_scrapping_data
+    return save_snapshot(symbol, get_scrapping_data(symbol)) is not None
+
+
+def symbols_to_refresh() -> List[str]:
+    """
+    Tickers we hold a position in, plus every ticker that has been scraped before.
+    """
+    held = Stock.objects.values_list("company_code", flat=True).distinct()
+    scraped = ScrapeSnapshot.objects.values_list("company_code", flat=True).distinct()
+    return sorted(set(held) | set(scraped))
+
+
+def prune_snapshots(symbol: str, keep: int = KEEP) -> int:
+    """
+    Delete all but the newest `keep` snapshots of `symbol`. Returns rows deleted.
+    """
+    stale_ids = list(
+        ScrapeSnapshot.objects
+        .filter(company_code=symbol.upper())
+        .order_by("-scraped_at")
+        .values_list("id", flat=True)[keep:]
+    )
+    if not stale_ids:
+        return 0
+    deleted, _ = ScrapeSnapshot.objects.filter(id__in=stale_ids).delete()
+    return deleted
+
+
+def as_of(snapshot: Optional[ScrapeSnapshot]) -> Optional[str]:
+    if snapshot is None:
+        return None
+    return snapshot.scraped_at.astimezone(dt.timezone.utc).isoformat()
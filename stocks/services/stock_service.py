@@ -1,26 +1,106 @@
 import os
+import gzip
+import time
+import uuid
+import hashlib
 import logging
 import datetime as dt
 from decimal import Decimal
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, FrozenSet, Iterable, Optional, Set, Tuple
 
-from django.core.cache import cache
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
 from django.db.models import Sum
 
 from ..models import Stock
+from ..db_router import mark_written, pin_primary, recently_written
+from . import prefetch, snapshots
+from ..profiling import stage_timer
+from ..renderers import FastJSONRenderer
 from .polygon_client import PolygonClient
-from .marketwatch_scraper import get_scrapping_data
 
 log = logging.getLogger(__name__)
 
 TTL = int(os.getenv("STOCK_CACHE_SECONDS", "300"))
+# Upper bound for the after-hours TTL (0 = cache until the next session rolls over)
+CLOSED_MAX_TTL = int(os.getenv("STOCK_CACHE_CLOSED_MAX_SECONDS", "0"))
 _CACHE_PREFIX = "stock:"
 
+# MarketWatch scraping can be switched off entirely (payload keeps empty defaults)
+SCRAPING_ENABLED = os.getenv("SCRAPING_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Store a gzip'd copy of the rendered body next to the payload
+STORE_GZIP = os.getenv("STOCK_CACHE_GZIP", "true").lower() in ("1", "true", "yes")
+GZIP_MIN_LENGTH = 200
+
+# Extra window (seconds) downstream caches may serve a stale copy while revalidating
+STALE_WHILE_REVALIDATE = int(os.getenv("STOCK_CACHE_SWR_SECONDS", "30"))
+
+# Two-tier payload cache (see stocks/cache.py and CACHES in settings.py)
+cache = ConnectionProxy(caches, "stock")
+# Shared cache without the per-process L1, for values every worker must agree on
+shared_cache = ConnectionProxy(caches, "default")
+
+# Per-ticker write generation (see bust_cache); only needs to outlive a build
+_GENERATION_PREFIX = "stock:generation:"
+_GENERATION_TIMEOUT = 24 * 3600
+
 
 def _cache_key(symbol: str) -> str:
     return f"{_CACHE_PREFIX}{symbol.upper()}"
 
 
+class RenderedPayload(dict):
+    """
+    A successful payload plus its pre-rendered JSON body (and optionally a
+    gzip'd copy). Cache hits can write these bytes straight to the response
+    instead of re-rendering the dict.
+
+    `etag` is a strong validator derived from the body, and `expires_at`
+    (epoch seconds) is when the cached entry expires, if known.
+    """
+    etag: Optional[str] = None
+    expires_at: Optional[float] = None
+
+    def __init__(self, data: Dict[str, Any], body: bytes, gzip_body: Optional[bytes] = None,
+                 expires_at: Optional[float] = None):
+        super().__init__(data)
+        self.body = body
+        self.gzip_body = gzip_body
+        self.etag = '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.expires_at = expires_at
+
+    def remaining_ttl(self) -> int:
+        """
+        Whole seconds until the cached entry expires (0 if unknown or past).
+        """
+        if self.expires_at is None:
+            return 0
+        return max(0, int(self.expires_at - time.time()))
+
+
+def render_payload(data: Dict[str, Any], ttl: Optional[int] = None) -> RenderedPayload:
+    """
+    Render `data` once, with the same renderer the API uses.
+    """
+    body = FastJSONRenderer().render(data)
+    gzip_body = None
+    if STORE_GZIP and len(body) >= GZIP_MIN_LENGTH:
+        # mtime=0 keeps the compressed bytes deterministic for a given body
+        gzip_body = gzip.compress(body, compresslevel=6, mtime=0)
+    expires_at = time.time() + ttl if ttl is not None else None
+    return RenderedPayload(data, body, gzip_body, expires_at)
+
+
+def get_scrapping_data(symbol: str) -> Dict[str, Any]:
+    """
+    Lazy proxy for marketwatch_scraper.get_scrapping_data: the scraper pulls in
+    bs4/lxml, so it is only imported on the first scrape, not at worker boot.
+    """
+    from .marketwatch_scraper import get_scrapping_data as scrape
+    return scrape(symbol)
+
+
 def _latest_company_name(symbol: str) -> Optional[str]:
     """
     Return the most recent non-empty company_name stored in DB for this ticker.
@@ -28,49 +108,96 @@ def _latest_company_name(symbol: str) -> Optional[str]:
     return (
         Stock.objects
         .filter(company_code=symbol.upper())
-        .exclude(company_name__isnull=True)
         .exclude(company_name__exact="")
+        # Matches stock_code_created_id_idx (company_name is INCLUDEd): index-only
+        .order_by("-created_at", "-id")
         .values_list("company_name", flat=True)
         .first()
     )
 
 
-def build_payload(symbol: str) -> Tuple[Dict[str, Any], int]:
+# Payload fields, in response order, and the stage that produces each one.
+# "company" (name lookup + ticker validation) always runs.
+FIELD_STAGES = {
+    "status":           None,
+    "purchased_amount": "position",
+    "purchased_status": "position",
+    "request_date":     "ohlc",
+    "company_code":     None,
+    "company_name":     "company",
+    "stock_values":     "ohlc",
+    "performance_data": "scrape",
+    "competitors":      "scrape",
+    "scraped_at":       "scrape",
+}
+ALL_STAGES = frozenset(s for s in FIELD_STAGES.values() if s)
+# Stages worth caching on their own (upstream calls); the DB aggregate is not.
+CACHED_STAGES = ("company", "ohlc", "scrape")
+
+
+def parse_fields(raw: Optional[str]) -> Optional[FrozenSet[str]]:
     """
-    Build the consolidated payload:
-      - purchased position from DB
-      - last trading day OHLC from Polygon
-      - performance + competitors from MarketWatch
+    "stock_values, purchased_amount" -> frozenset. None/empty -> None (all).
+    Raises ValueError listing unknown field names.
+    """
+    if not raw:
+        return None
+    fields = frozenset(f.strip() for f in raw.split(",") if f.strip())
+    unknown = sorted(fields - FIELD_STAGES.keys())
+    if unknown:
+        raise ValueError(", ".join(unknown))
+    return fields or None
 
-    On invalid ticker, return {"status":"error", "error": "...", "http_status": 400}.
-    Upstream hiccups should degrade to None fields instead of raising.
+
+def _stages_for(fields: Optional[Iterable[str]]) -> Set[str]:
+    if fields is None:
+        return set(ALL_STAGES)
+    return {FIELD_STAGES[f] for f in fields if FIELD_STAGES.get(f)} | {"company"}
+
+
+def project_fields(data: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
     """
-    symbol = symbol.upper()
-    poly = PolygonClient()
+    Keep only `fields` (plus status/company_code) from a payload.
+    """
+    if fields is None:
+        return data
+    keep = set(fields) | {"status", "company_code"}
+    return {k: v for k, v in data.items() if k in keep}
 
-    # Sum purchased amount
+
+def _stage_position(symbol: str) -> Dict[str, Any]:
     total: Decimal = (
         Stock.objects.filter(company_code=symbol)
         .aggregate(total=Sum("amount"))["total"]
         or Decimal("0")
     )
-    purchased_status = "purchased" if total > 0 else "none"
+    return {
+        "purchased_amount": float(total),
+        "purchased_status": "purchased" if total > 0 else "none",
+    }
+
 
-    # Company name: DB → Polygon
+def _stage_company(symbol: str, poly: PolygonClient) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[Dict[str, Any], int]]]:
+    """
+    Company name: DB → Polygon. Returns (stage, None) or (None, error response).
+    """
     company_name = _latest_company_name(symbol)
     if not company_name:
         info = poly.get_company_info(symbol)
         if info is None:
             log.warning("Polygon company lookup unavailable for %s; returning 503.", symbol)
-            return {"status": "error",
-                    "error": "ticker validation service temporarily unavailable"}, 503
+            return None, ({"status": "error",
+                           "error": "ticker validation service temporarily unavailable"}, 503)
 
         company_name = info.get("name")
         if not company_name:
             log.info("Ticker %s not found/invalid on Polygon; returning 400.", symbol)
-            return {"status": "error",
-                    "error": "invalid or unknown ticker"}, 400
+            return None, ({"status": "error",
+                           "error": "invalid or unknown ticker"}, 400)
+    return {"company_name": company_name}, None
+
 
+def _stage_ohlc(symbol: str, poly: PolygonClient) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[Dict[str, Any], int]]]:
     # Last trading day
     trade_date = poly.last_trading_day()
 
@@ -89,29 +216,42 @@ def build_payload(symbol: str) -> Tuple[Dict[str, Any], int]:
             "could not retrieve recent OHLC data: %s (last status=%s)",
             trade_date, ohlc.get("_polygon_status")
         )
-        return {
+        return None, ({
             "status": "error",
             "error": "could not retrieve recent OHLC data",
-        }, 503
-
-    # MarketWatch scrapping (non-critical; degrade to empty data on failure)
-    scrap = get_scrapping_data(symbol)
-    performance = scrap.get("performance", {}) or {}
-    competitors = scrap.get("competitors", []) or []
+        }, 503)
 
     return {
-        "status": "ok",
-        "purchased_amount": float(total),
-        "purchased_status": purchased_status,
         "request_date": (ohlc.get("date") or trade_date.isoformat()),
-        "company_code": symbol,
-        "company_name": company_name,
         "stock_values": {
             "open":  ohlc.get("open"),
             "high":  ohlc.get("high"),
             "low":   ohlc.get("low"),
             "close": ohlc.get("close"),
         },
+    }, None
+
+
+def _stage_scrape(symbol: str) -> Dict[str, Any]:
+    """
+    MarketWatch performance + competitors, served from the latest persisted
+    snapshot (kept fresh by `manage.py refresh_scrapes`); `scraped_at` tells
+    its age. Only a ticker with no snapshot at all is scraped inline (cold
+    start); old snapshots are the scheduler's job, never the request's.
+    """
+    # MarketWatch scrapping (non-critical; degrade to empty data on failure)
+    snapshot = None
+    if SCRAPING_ENABLED:
+        snapshot = snapshots.latest_snapshot(symbol)
+        if snapshot is None and snapshots.INLINE_ON_COLD_START:
+            snapshot = snapshots.save_snapshot(symbol, get_scrapping_data(symbol))
+        elif snapshot is not None and snapshots.snapshot_age(snapshot) > snapshots.MAX_AGE:
+            log.warning("Serving %s snapshot from %s; is refresh_scrapes running?",
+                        symbol, snapshots.as_of(snapshot))
+
+    performance = (snapshot.performance if snapshot else {}) or {}
+    competitors = (snapshot.competitors if snapshot else []) or []
+    return {
         "performance_data": {
             "five_days":     performance.get("five_days"),
             "one_month":     performance.get("one_month"),
@@ -120,28 +260,176 @@ def build_payload(symbol: str) -> Tuple[Dict[str, Any], int]:
             "one_year":      performance.get("one_year"),
         },
         "competitors": competitors,
-    }, 200
+        "scraped_at": snapshots.as_of(snapshot),
+    }
+
+
+def build_payload(symbol: str, fields: Optional[Iterable[str]] = None,
+                  stages: Optional[Dict[str, Dict[str, Any]]] = None) -> Tuple[Dict[str, Any], int]:
+    """
+    Build the consolidated payload:
+      - purchased position from DB
+      - last trading day OHLC from Polygon
+      - performance + competitors from MarketWatch
+
+    `fields` limits the payload (and the work done) to the stages those fields
+    need; e.g. no MarketWatch scrape unless performance_data/competitors are
+    requested. `stages` holds already-known stage results (e.g. from cache);
+    stages computed here are added to it so the caller can cache them.
+
+    On invalid ticker, return {"status":"error", "error": "...", "http_status": 400}.
+    Upstream hiccups should degrade to None fields instead of raising.
+    """
+    symbol = symbol.upper()
+    poly = PolygonClient()
+    wanted = _stages_for(fields)
+    stages = {} if stages is None else stages
+
+    # Sum purchased amount
+    if "position" in wanted:
+        with stage_timer("position"):
+            stages["position"] = _stage_position(symbol)
+
+    if "company" not in stages:
+        with stage_timer("company"):
+            stage, error = _stage_company(symbol, poly)
+        if error:
+            return error
+        stages["company"] = stage
+
+    if "ohlc" in wanted and "ohlc" not in stages:
+        with stage_timer("ohlc"):
+            stage, error = _stage_ohlc(symbol, poly)
+        if error:
+            return error
+        stages["ohlc"] = stage
+
+    if "scrape" in wanted and "scrape" not in stages:
+        with stage_timer("scrape"):
+            stages["scrape"] = _stage_scrape(symbol)
+
+    values = {"status": "ok", "company_code": symbol}
+    for name in wanted:
+        values.update(stages[name])
+    data = {k: values[k] for k in FIELD_STAGES if k in values}
+    return project_fields(data, fields), 200
+
+
+def payload_ttl(data: Dict[str, Any]) -> int:
+    """
+    Market-hours-aware expiry for a successful payload.
+
+    While the market is open we keep the short TTL (MarketWatch performance
+    moves intraday). Otherwise the OHLC doesn't change until last_trading_day()
+    rolls over at the next 16:10 ET cutoff, but the session opens before that,
+    so we cache until whichever comes first: an evening or weekend build lives
+    until the next open, not through it. If the payload's OHLC date isn't the
+    expected trading day (holiday, or Polygon hasn't published yet) we stay on
+    the short TTL. Same when the scrape found no snapshot yet (cold start
+    or captcha): refresh_scrapes may store one any minute.
+    """
+    if PolygonClient.is_market_open():
+        return TTL
+    if data.get("request_date") != PolygonClient.last_trading_day().isoformat():
+        return TTL
+    if _missing_scrape(data):
+        return TTL
+
+    closed_for = min(PolygonClient.seconds_until_rollover(), PolygonClient.seconds_until_open())
+    ttl = max(TTL, int(closed_for))
+    if CLOSED_MAX_TTL:
+        ttl = min(ttl, CLOSED_MAX_TTL)
+    return ttl
 
 
-def get_payload_cached(symbol: str) -> Tuple[Dict[str, Any], int]:
+def _missing_scrape(stage: Dict[str, Any]) -> bool:
+    """
+    True for a scrape result (stage or payload) built without any snapshot.
+    """
+    return SCRAPING_ENABLED and "scraped_at" in stage and stage["scraped_at"] is None
+
+
+def _generation(symbol: str) -> Optional[str]:
+    return shared_cache.get(f"{_GENERATION_PREFIX}{symbol.upper()}")
+
+
+def _stage_key(symbol: str, stage: str) -> str:
+    return f"{_cache_key(symbol)}:stage:{stage}"
+
+
+def _build_with_stage_cache(symbol: str, fields: Optional[Iterable[str]]) -> Tuple[Dict[str, Any], int]:
+    """
+    build_payload, reusing and refilling the per-stage cache so partial and
+    full requests share upstream results. A scrape stage without a snapshot
+    is not cached, so the next build picks up the first stored one.
+    """
+    keys = {_stage_key(symbol, s): s for s in CACHED_STAGES}
+    stages = {keys[k]: v for k, v in cache.get_many(list(keys)).items()}
+    known = set(stages)
+
+    # Right after a write to this ticker, read the primary, not a lagging replica.
+    with pin_primary(recently_written(symbol)):
+        data, http_status = build_payload(symbol, fields, stages)
+
+    fresh = {s: stages[s] for s in CACHED_STAGES if s in stages and s not in known}
+    if _missing_scrape(fresh.get("scrape", {})):
+        del fresh["scrape"]
+    if fresh:
+        request_date = (stages.get("ohlc") or {}).get("request_date")
+        cache.set_many({_stage_key(symbol, s): v for s, v in fresh.items()},
+                       payload_ttl({"request_date": request_date}))
+    return data, http_status
+
+
+def get_payload_cached(symbol: str, fields: Optional[Iterable[str]] = None) -> Tuple[Dict[str, Any], int]:
     """
     Read from cache; on miss, compute and (only) cache successful results.
     Errors are returned as-is but are not cached.
+
+    Successful results are returned as a RenderedPayload (a dict carrying its
+    rendered JSON bytes), which is also what gets cached.
+
+    With `fields`, a cached full payload is projected if present; otherwise
+    only the needed stages run. Upstream stages are cached individually so a
+    later full request reuses them (and vice versa).
+
+    A fresh build offers the ticker's competitors to the prefetcher (when
+    enabled), since those are the symbols users tend to open next.
+
+    A build that overlaps a bust_cache() for the same ticker may have read
+    the database before the write landed, so it is returned but not cached.
     """
     key = _cache_key(symbol)
-    data = cache.get(key)
+    with stage_timer("cache"):
+        data = cache.get(key)
     if data is not None:
-        return data, 200
+        prefetch.record_hit(symbol)
+        return project_fields(data, fields), 200
 
-    data, http_status = build_payload(symbol)
+    generation = _generation(symbol)
+    data, http_status = _build_with_stage_cache(symbol, fields)
     if http_status == 200:
-        cache.set(key, data, TTL)
+        prefetch.offer_competitors(symbol, data.get("competitors"))
+    if http_status == 200 and fields is None:
+        ttl = payload_ttl(data)
+        data = render_payload(data, ttl)
+        if _generation(symbol) == generation:
+            cache.set(key, data, ttl)
+            # A bust between the check and the set deleted before we wrote.
+            if _generation(symbol) != generation:
+                cache.delete(key)
     return data, http_status
 
 
-
 def bust_cache(symbol: str) -> None:
     """
-    Remove the cached payload for this ticker.
+    Remove the cached payload and stages for this ticker, in every worker:
+    the tiered cache deletes them from L2 and broadcasts an L1 invalidation.
+    Also opens the sticky-primary window so the rebuild sees the write.
+
+    The ticker's generation changes before the delete, so a build already
+    in flight (possibly reading a lagging replica) won't cache its result.
     """
-    cache.delete(_cache_key(symbol))
+    mark_written(symbol)
+    shared_cache.set(f"{_GENERATION_PREFIX}{symbol.upper()}", uuid.uuid4().hex, _GENERATION_TIMEOUT)
+    cache.delete_many([_cache_key(symbol), *(_stage_key(symbol, s) for s in CACHED_STAGES)])
@@ -0,0 +1,102 @@
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from stocks.cache import TieredCache
+
+L2_ONLY = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tiered-l2"},
+}
+
+
+def _worker(name, **options):
+    """
+    Build a TieredCache with its own L1, as a separate worker process would have.
+    """
+    opts = {"L1_NAME": name, "L1_TIMEOUT": 60, "POLL_INTERVAL": 0}
+    opts.update(options)
+    tiered = TieredCache("default", {"OPTIONS": opts})
+    tiered.clear_local()
+    return tiered
+
+
+@override_settings(CACHES=L2_ONLY)
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches["default"].clear()
+
+    def test_get_fills_l1_from_l2(self):
+        caches["default"].set("k", {"v": 1})
+        w = _worker("w-fill")
+
+        self.assertEqual(w.get("k"), {"v": 1})
+        caches["default"].delete("k")  # behind L1's back
+        self.assertEqual(w.get("k"), {"v": 1})
+
+    def test_set_writes_through_to_l2(self):
+        w1, w2 = _worker("w-set-1"), _worker("w-set-2")
+        w1.set("k", "v", 30)
+        self.assertEqual(caches["default"].get("k"), "v")
+        self.assertEqual(w2.get("k"), "v")
+
+    def test_delete_invalidates_other_workers_l1(self):
+        w1, w2 = _worker("w-del-1"), _worker("w-del-2")
+        w1.get("warmup")
+        w2.get("warmup")
+        w1.set("k", "old", 30)
+        self.assertEqual(w2.get("k"), "old")  # now in w2's L1
+
+        w1.delete("k")
+
+        self.assertIsNone(w2.get("k"))
+
+    def test_expired_messages_drop_whole_l1(self):
+        w1, w2 = _worker("w-exp-1"), _worker("w-exp-2", MAX_BACKLOG=1)
+        w2.get("warmup")
+        w1.set("a", 1, 30)
+        w1.set("b", 2, 30)
+        w2.get("a")
+        w2.get("b")
+
+        w1.delete("a")
+        w1.delete("zzz")
+
+        caches["default"].set("b", 3, 30)  # L2 moved on; w2 must refetch
+        self.assertIsNone(w2.get("a"))
+        self.assertEqual(w2.get("b"), 3)
+
+    def test_concurrent_publishers_never_share_a_slot(self):
+        w1, w2 = _worker("w-race-1"), _worker("w-race-2")
+        w2.get("warmup")
+        w1.set("a", 1, 30)
+        w1.set("b", 2, 30)
+        w2.get("a")
+        w2.get("b")
+
+        w1.delete("a")
+        # A second publisher read the counter before the first one wrote it back.
+        seq_key = w1._seq_key()
+        caches["default"].set(seq_key, caches["default"].get(seq_key) - 1)
+        w1.delete("b")
+
+        caches["default"].set("a", 10, 30)
+        caches["default"].set("b", 20, 30)
+        self.assertEqual((w2.get("a"), w2.get("b")), (10, 20))
+
+    def test_reader_picks_up_slots_past_a_stale_counter(self):
+        w1, w2 = _worker("w-stale-1"), _worker("w-stale-2")
+        w2.get("warmup")
+        w1.set("k", "old", 30)
+        w2.get("k")
+
+        seq_key = w1._seq_key()
+        before = caches["default"].get(seq_key, 0)
+        w1.delete("k")
+        caches["default"].set(seq_key, before)  # counter write lost
+
+        self.assertIsNone(w2.get("k"))
+        self.assertEqual(caches["default"].get(seq_key), before + 1)  # repaired
+
+    def test_l1_ttl_never_exceeds_entry_timeout(self):
+        w = _worker("w-ttl")
+        self.assertEqual(w._l1_timeout_for(2), 2)
+        self.assertEqual(w._l1_timeout_for(None), 60)
@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from stocks import db_router
+from stocks.db_router import ReplicaRouter, pin_primary
+from stocks.models import Stock
+from stocks.services import stock_service
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"], DB_STICKY_PRIMARY_SECONDS=10)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        stock_service.cache.clear()
+        self.router = ReplicaRouter()
+
+    def test_stock_reads_go_to_replica_and_writes_to_primary(self):
+        self.assertEqual(self.router.db_for_read(Stock), "replica_0")
+        self.assertEqual(self.router.db_for_write(Stock), "default")
+
+    def test_other_apps_are_not_routed(self):
+        self.assertIsNone(self.router.db_for_read(User))
+
+    def test_pin_primary_block(self):
+        with pin_primary():
+            self.assertEqual(self.router.db_for_read(Stock), "default")
+        with pin_primary(False):
+            self.assertEqual(self.router.db_for_read(Stock), "replica_0")
+
+    def test_no_replicas_configured_uses_primary(self):
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.router.db_for_read(Stock), "default")
+
+    def test_replicas_are_never_migrated(self):
+        self.assertFalse(self.router.allow_migrate("replica_0", "stocks"))
+        self.assertIsNone(self.router.allow_migrate("default", "stocks"))
+
+    def test_bust_cache_opens_sticky_primary_window_for_the_symbol(self):
+        seen = []
+
+        def build(symbol, fields, stages):
+            seen.append(self.router.db_for_read(Stock))
+            return {"status": "error", "error": "x"}, 503
+
+        with patch("stocks.services.stock_service.build_payload", side_effect=build):
+            stock_service.get_payload_cached("AAPL")
+            stock_service.bust_cache("aapl")
+            stock_service.get_payload_cached("AAPL")
+            stock_service.get_payload_cached("MSFT")
+
+        self.assertEqual(seen, ["replica_0", "default", "replica_0"])
+
+    def test_build_overlapping_a_bust_is_not_cached(self):
+        builds = []
+
+        def build(symbol, fields, stages):
+            builds.append(symbol)
+            if len(builds) == 1:
+                # The write lands (and busts) while this build reads the replica.
+                stock_service.bust_cache(symbol)
+            return {"status": "ok", "company_code": symbol}, 200
+
+        with patch("stocks.services.stock_service.build_payload", side_effect=build):
+            stock_service.get_payload_cached("AAPL")
+            stock_service.get_payload_cached("AAPL")
+            stock_service.get_payload_cached("AAPL")
+
+        self.assertEqual(builds, ["AAPL", "AAPL"])
+
+    def test_sticky_window_expires(self):
+        db_router.mark_written("AAPL")
+        self.assertTrue(db_router.recently_written("AAPL"))
+        cache.delete("db:pin-primary:AAPL")
+        self.assertFalse(db_router.recently_written("AAPL"))
@@ -0,0 +1,152 @@
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import requests
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIClient
+
+from stocks.services import hedging
+from stocks.services.hedging import hedged_call, latency
+from stocks.services.polygon_client import PolygonClient
+
+
+def _prime(endpoint, seconds, n=hedging.MIN_SAMPLES):
+    for _ in range(n):
+        latency(endpoint).observe(seconds)
+        latency(endpoint).incr("requests")
+
+
+@patch.dict(hedging._latencies, clear=True)
+@patch("stocks.services.hedging.MIN_TIMEOUT", 0.0)
+class HedgedCallTests(SimpleTestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def _slow_then(self, *later):
+        """
+        send(): the first attempt blocks until the test ends, later ones
+        return `later` in order.
+        """
+        results = iter(later)
+
+        def send(timeout):
+            if not self.release.is_set() and send.calls == 0:
+                send.calls += 1
+                self.release.wait(2)
+                return "slow"
+            send.calls += 1
+            return next(results)
+        send.calls = 0
+        return send
+
+    def test_no_history_runs_inline_with_the_default_timeout(self):
+        send = Mock(return_value="ok")
+        self.assertEqual(hedged_call("ep", send, 10), "ok")
+        send.assert_called_once_with(10)
+        self.assertEqual(latency("ep").counters["hedged"], 0)
+
+    def test_timeout_adapts_to_observed_latency(self):
+        _prime("ep", 0.1)
+        send = Mock(return_value="ok")
+        hedged_call("ep", send, 10)
+        self.assertAlmostEqual(send.call_args.args[0], 0.1 * hedging.TIMEOUT_MULTIPLIER)
+
+        with patch("stocks.services.hedging.ADAPTIVE_TIMEOUT", False):
+            hedged_call("ep", send, 10)
+        self.assertEqual(send.call_args.args[0], 10)
+
+    def test_slow_first_attempt_is_hedged_and_hedge_wins(self):
+        _prime("ep", 0.05)
+        start = time.monotonic()
+        self.assertEqual(hedged_call("ep", self._slow_then("fast"), 10), "fast")
+
+        self.assertLess(time.monotonic() - start, 1)
+        counters = latency("ep").counters
+        self.assertEqual((counters["hedged"], counters["hedge_wins"]), (1, 1))
+
+    def test_non_final_hedge_waits_for_the_first_attempt(self):
+        _prime("ep", 0.05)
+        send = self._slow_then("503")
+        threading.Timer(0.2, self.release.set).start()
+
+        result = hedged_call("ep", send, 10, is_final=lambda r: r != "503")
+
+        self.assertEqual(result, "slow")
+        self.assertEqual(latency("ep").counters["hedge_wins"], 0)
+
+    def test_fast_first_attempt_is_not_hedged(self):
+        _prime("ep", 0.05)
+        self.assertEqual(hedged_call("ep", Mock(return_value="ok"), 10), "ok")
+        self.assertEqual(latency("ep").counters["hedged"], 0)
+
+    def test_hedging_respects_budget_and_switch(self):
+        _prime("ep", 0.05)
+        latency("ep").counters["hedged"] = 10
+        threading.Timer(0.2, self.release.set).start()
+        with patch("stocks.services.hedging.HEDGE_BUDGET", 0.1):
+            self.assertEqual(hedged_call("ep", self._slow_then("fast"), 0.5), "slow")
+        self.assertEqual(latency("ep").counters["hedged"], 10)
+
+        with patch("stocks.services.hedging.HEDGE_ENABLED", False):
+            self.assertIsNone(latency("ep").hedge_delay(10))
+
+    def test_full_pool_runs_the_first_attempt_inline(self):
+        _prime("ep", 0.05)
+        send = Mock(side_effect=lambda timeout: threading.current_thread())
+        with patch("stocks.services.hedging._inflight", hedging.MAX_WORKERS):
+            self.assertIs(hedged_call("ep", send, 10), threading.current_thread())
+        self.assertEqual(latency("ep").counters["pool_full"], 1)
+
+    def test_latency_includes_time_queued_for_a_pool_thread(self):
+        _prime("ep", 0.5)
+        pool = hedging._get_executor()
+
+        def queued(fn, *args):
+            return pool.submit(lambda: (time.sleep(0.1), fn(*args))[1])
+
+        with patch("stocks.services.hedging._get_executor", return_value=Mock(submit=queued)):
+            hedged_call("ep", Mock(return_value="ok"), 10)
+        self.assertGreaterEqual(latency("ep")._samples[-1], 0.1)
+        self.assertEqual(hedging._inflight, 0)
+
+    def test_timeouts_are_counted_and_observed(self):
+        send = Mock(side_effect=requests.Timeout())
+        with self.assertRaises(requests.Timeout):
+            hedged_call("ep", send, 2)
+        self.assertEqual(latency("ep").counters["timeouts"], 1)
+        self.assertEqual(list(latency("ep")._samples), [2])
+
+
+@patch.dict(hedging._latencies, clear=True)
+class PolygonHedgingTests(SimpleTestCase):
+    @patch.object(PolygonClient, "BASE_URL", "https://polygon.test")
+    @patch("stocks.services.polygon_client.requests.get")
+    def test_client_requests_are_tracked_per_endpoint(self, get):
+        get.return_value = Mock(status_code=200, json=Mock(return_value={"results": [{"name": "Apple Inc."}]}))
+        client = PolygonClient(api_key="k")
+
+        self.assertEqual(client.get_company_info("aapl"), {"name": "Apple Inc."})
+        self.assertEqual(get.call_args.kwargs["timeout"], client.timeout)
+        self.assertEqual(latency("reference/tickers").counters["requests"], 1)
+
+    @override_settings(STOCK_METRICS_ENABLED=True)
+    def test_metrics_endpoint(self):
+        cache.clear()
+        _prime("open-close", 0.2)
+        staff = APIClient()
+        staff.force_authenticate(User(username="ops", is_staff=True))
+
+        self.assertEqual(APIClient().get("/api/metrics/").status_code, 403)
+        body = staff.get("/api/metrics/").json()
+
+        ohlc = body["polygon"]["endpoints"]["open-close"]
+        self.assertEqual(ohlc["p95_ms"], 200.0)
+        self.assertEqual(ohlc["timeout_ms"], 1000.0)  # p99 × 3 = 600 ms, raised to the 1 s floor
+        self.assertIn("hit_rate", body["prefetch"])
+
+        with self.settings(STOCK_METRICS_ENABLED=False):
+            self.assertEqual(staff.get("/api/metrics/").status_code, 404)
@@ -36,3 +36,36 @@ class LastTradingDayTests(SimpleTestCase):
         with self._freeze_et(2025, 8, 16, 15):  # saturday
             d = PolygonClient.last_trading_day()
             self.assertEqual(d, dt.date(2025, 8, 15))  # friday
+
+
+class MarketClockTests(SimpleTestCase):
+    _freeze_et = LastTradingDayTests._freeze_et
+
+    def test_market_open_during_session(self):
+        from stocks.services.polygon_client import PolygonClient
+        with self._freeze_et(2025, 8, 20, 15):  # 11:00 ET wednesday
+            self.assertTrue(PolygonClient.is_market_open())
+
+    def test_market_closed_after_cutoff_and_weekend(self):
+        from stocks.services.polygon_client import PolygonClient
+        with self._freeze_et(2025, 8, 20, 21):  # 17:00 ET
+            self.assertFalse(PolygonClient.is_market_open())
+        with self._freeze_et(2025, 8, 16, 15):  # saturday
+            self.assertFalse(PolygonClient.is_market_open())
+
+    def test_rollover_before_cutoff_is_today(self):
+        from stocks.services.polygon_client import PolygonClient
+        with self._freeze_et(2025, 8, 20, 12):  # 08:00 ET ⇒ 8h10m to 16:10 ET
+            self.assertEqual(PolygonClient.seconds_until_rollover(), 8 * 3600 + 600)
+
+    def test_rollover_friday_evening_is_monday(self):
+        from stocks.services.polygon_client import PolygonClient
+        with self._freeze_et(2025, 8, 22, 21):  # friday 17:00 ET ⇒ monday 16:10 ET
+            self.assertEqual(PolygonClient.seconds_until_rollover(), 71 * 3600 + 600)
+
+    def test_seconds_until_open(self):
+        from stocks.services.polygon_client import PolygonClient
+        with self._freeze_et(2025, 8, 20, 13):  # wednesday 09:00 ET
+            self.assertEqual(PolygonClient.seconds_until_open(), 1800)
+        with self._freeze_et(2025, 8, 22, 21):  # friday 17:00 ET ⇒ monday 09:30 ET
+            self.assertEqual(PolygonClient.seconds_until_open(), 64 * 3600 + 1800)
@@ -0,0 +1,139 @@
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from stocks.services import prefetch, stock_service
+from stocks.services.prefetch import Prefetcher
+
+
+def _prefetcher(fetch=None, **kwargs):
+    kwargs.setdefault("rate_per_minute", 0)
+    return Prefetcher(fetch=fetch or _ok, autostart=False, **kwargs)
+
+
+def _ok(symbol):
+    return stock_service.render_payload({"status": "ok", "company_code": symbol}, 60), 200
+
+
+@patch("stocks.services.prefetch.ENABLED", True)
+class PrefetcherTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        stock_service.cache.clear()
+        prefetch._warmed.clear()
+
+    def test_offer_filters_source_duplicates_and_missing_tickers(self):
+        p = _prefetcher()
+        queued = p.offer(["msft", None, "AAPL", "MSFT", "GOOGL"], source="aapl")
+        self.assertEqual(queued, ["MSFT", "GOOGL"])
+
+    def test_cooldown_and_cached_payloads_are_skipped(self):
+        p = _prefetcher()
+        stock_service.cache.set(stock_service._cache_key("GOOGL"), {"status": "ok"})
+        p.offer(["MSFT"])
+
+        self.assertEqual(p.offer(["MSFT", "GOOGL"]), [])
+        stats = prefetch.stats()
+        self.assertEqual((stats["cooldown"], stats["cached"]), (1, 1))
+
+    def test_full_queue_drops_and_releases_cooldown(self):
+        p = _prefetcher(queue_size=1)
+        self.assertEqual(p.offer(["MSFT", "GOOGL"]), ["MSFT"])
+        self.assertEqual(prefetch.stats()["dropped"], 1)
+
+        p.process_next()
+        self.assertEqual(p.offer(["GOOGL"]), ["GOOGL"])
+
+    def test_build_is_rate_limited(self):
+        fetch = Mock(side_effect=_ok)
+        p = _prefetcher(fetch, rate_per_minute=6)
+        p.offer(["MSFT", "GOOGL"])
+
+        self.assertTrue(p.process_next())
+        self.assertGreater(p.delay(), 9)
+        p.stop()  # the second build would wait ~10s; stopping abandons it
+        self.assertFalse(p.process_next())
+        fetch.assert_called_once_with("MSFT")
+
+    def test_hit_rate_counts_first_client_hit_only(self):
+        p = _prefetcher()
+        p.offer(["MSFT", "GOOGL"])
+        p.process_next()
+        p.process_next()
+
+        prefetch.record_hit("msft")
+        prefetch.record_hit("MSFT")
+
+        stats = prefetch.stats()
+        self.assertEqual((stats["fetched"], stats["hits"]), (2, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_hits_skip_the_shared_cache_unless_this_process_warmed_the_ticker(self):
+        p = _prefetcher()
+        p.offer(["MSFT"])
+        p.process_next()
+
+        with patch.object(prefetch.cache, "delete", wraps=prefetch.cache.delete) as delete:
+            prefetch.record_hit("AAPL")  # never prefetched
+            with prefetch.background_reads():
+                prefetch.record_hit("MSFT")  # a stream poller, not a client
+            delete.assert_not_called()
+
+            prefetch.record_hit("MSFT")
+            prefetch.record_hit("MSFT")
+            delete.assert_called_once_with("prefetch:warm:MSFT")
+        self.assertEqual(prefetch.stats()["hits"], 1)
+
+    def test_failed_build_is_counted(self):
+        p = _prefetcher(Mock(side_effect=RuntimeError("polygon down")))
+        p.offer(["MSFT"])
+        p.process_next()
+        self.assertEqual(prefetch.stats()["failed"], 1)
+
+    def test_stats_command(self):
+        p = _prefetcher()
+        p.offer(["MSFT"])
+        p.process_next()
+        out = StringIO()
+        call_command("prefetch_stats", "--reset", stdout=out)
+        self.assertIn("fetched: 1", out.getvalue())
+        self.assertEqual(prefetch.stats()["fetched"], 0)
+
+
+class PayloadPrefetchHookTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        stock_service.cache.clear()
+
+    def _build(self, symbol, fields, stages):
+        return {"status": "ok", "company_code": symbol, "request_date": "2025-08-20",
+                "competitors": [{"name": "Microsoft", "symbol": "MSFT"},
+                                {"name": "Samsung", "symbol": None}]}, 200
+
+    @patch("stocks.services.prefetch.get_prefetcher")
+    def test_fresh_build_offers_competitors(self, get_prefetcher):
+        with patch("stocks.services.prefetch.ENABLED", True), \
+             patch("stocks.services.stock_service.build_payload", side_effect=self._build):
+            stock_service.get_payload_cached("AAPL")
+            stock_service.get_payload_cached("AAPL")  # cache hit: no second offer
+
+        get_prefetcher.return_value.offer.assert_called_once_with(["MSFT", None], source="AAPL")
+
+    @patch("stocks.services.prefetch.get_prefetcher")
+    def test_disabled_by_default(self, get_prefetcher):
+        with patch("stocks.services.stock_service.build_payload", side_effect=self._build):
+            stock_service.get_payload_cached("AAPL")
+        get_prefetcher.assert_not_called()
+
+    @patch("stocks.services.prefetch.ENABLED", True)
+    def test_prefetch_builds_do_not_cascade(self):
+        p = Prefetcher(rate_per_minute=0, autostart=False)
+        p.offer(["MSFT"], source="AAPL")
+        with patch("stocks.services.stock_service.build_payload", side_effect=self._build), \
+             patch("stocks.services.prefetch.get_prefetcher") as get_prefetcher:
+            p.process_next()
+        get_prefetcher.assert_not_called()
+        self.assertIsNotNone(stock_service.cache.get(stock_service._cache_key("MSFT")))
@@ -0,0 +1,102 @@
+import os
+import time
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from stocks import profiling
+from stocks.profiling import ProfilingMiddleware, stage_timer
+
+
+def _view(delay=0.0):
+    def get_response(request):
+        with stage_timer("ohlc"):
+            time.sleep(delay)
+        with stage_timer("render"):
+            pass
+        return HttpResponse("{}", status=200)
+    return get_response
+
+
+class StageTimerTests(SimpleTestCase):
+    def test_no_op_outside_a_profiled_request(self):
+        with stage_timer("ohlc"):
+            pass
+        with profiling.collect_stages() as stages:
+            with stage_timer("ohlc"):
+                pass
+            with stage_timer("ohlc"):
+                pass
+        self.assertEqual(list(stages), ["ohlc"])
+
+
+@override_settings(STOCK_PROFILING_ENABLED=True, STOCK_PROFILE_SAMPLE_RATE=0.0,
+                   STOCK_PROFILE_SLOW_MS=30, STOCK_PROFILE_SAMPLE_INTERVAL_MS=1,
+                   STOCK_PROFILE_KEEP=3)
+class ProfilingMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        override = override_settings(STOCK_PROFILE_DIR=self.dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.rf = RequestFactory()
+
+    def test_disabled_middleware_is_not_used(self):
+        with self.settings(STOCK_PROFILING_ENABLED=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                ProfilingMiddleware(_view())
+
+    def test_sampled_request_saves_pstats_with_stage_timings(self):
+        with self.settings(STOCK_PROFILE_SAMPLE_RATE=1.0):
+            ProfilingMiddleware(_view())(self.rf.get("/api/stock/aapl/"))
+
+        [meta] = profiling.list_profiles()
+        self.assertEqual((meta["symbol"], meta["reason"], meta["format"]), ("AAPL", "sampled", "pstats"))
+        self.assertEqual(set(meta["stages"]), {"ohlc", "render"})
+        self.assertTrue(os.path.exists(profiling.profile_path(meta)))
+
+    def test_slow_request_saves_collapsed_stacks(self):
+        ProfilingMiddleware(_view(delay=0.1))(self.rf.get("/api/stock/MSFT/"))
+
+        [meta] = profiling.list_profiles("msft")
+        self.assertEqual((meta["reason"], meta["format"]), ("slow", "collapsed"))
+        self.assertGreaterEqual(meta["stages"]["ohlc"], 100)
+        with open(profiling.profile_path(meta)) as f:
+            self.assertIn("get_response (test_profiling.py", f.read())
+
+    def test_fast_unsampled_and_other_paths_are_not_saved(self):
+        middleware = ProfilingMiddleware(_view())
+        middleware(self.rf.get("/api/stock/AAPL/"))
+        with self.settings(STOCK_PROFILE_SAMPLE_RATE=1.0):
+            middleware(self.rf.get("/api/stream/"))
+        self.assertEqual(profiling.list_profiles(), [])
+
+    def test_ring_buffer_keeps_newest(self):
+        with self.settings(STOCK_PROFILE_SAMPLE_RATE=1.0):
+            middleware = ProfilingMiddleware(_view())
+            for symbol in ("A", "B", "C", "D", "E"):
+                middleware(self.rf.get(f"/api/stock/{symbol}/"))
+
+        self.assertEqual([m["symbol"] for m in profiling.list_profiles()], ["E", "D", "C"])
+        self.assertEqual(len(os.listdir(self.dir)), 6)
+
+    def test_command_lists_summarizes_and_shows(self):
+        with self.settings(STOCK_PROFILE_SAMPLE_RATE=1.0):
+            ProfilingMiddleware(_view(delay=0.01))(self.rf.get("/api/stock/AAPL/"))
+        ProfilingMiddleware(_view(delay=0.05))(self.rf.get("/api/stock/AAPL/"))
+
+        out = StringIO()
+        call_command("stock_profiles", stdout=out)
+        self.assertIn("2 profiles", out.getvalue())
+        self.assertIn("slowest in 2", out.getvalue())  # ohlc
+
+        for meta in profiling.list_profiles():
+            out = StringIO()
+            call_command("stock_profiles", "--show", meta["id"], stdout=out)
+            self.assertIn("/api/stock/AAPL/", out.getvalue())
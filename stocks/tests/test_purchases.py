@@ -0,0 +1,97 @@
+import datetime as dt
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from stocks.db_router import pin_primary
+from stocks.models import Stock
+from stocks.services.purchases import list_purchases, encode_cursor
+from stocks.services.stock_service import _latest_company_name
+
+T0 = dt.datetime(2025, 8, 20, 12, 0, tzinfo=dt.timezone.utc)
+
+
+def _purchase(code, name, amount, created_at):
+    row = Stock.objects.create(company_code=code, company_name=name, amount=Decimal(amount))
+    Stock.objects.filter(pk=row.pk).update(created_at=created_at)
+    return row.pk
+
+
+class ListPurchasesTests(TestCase):
+    def setUp(self):
+        # two rows share a timestamp: the id tiebreaker must keep pages disjoint
+        self.ids = [
+            _purchase("AAPL", "Apple", "1", T0),
+            _purchase("AAPL", "Apple", "2", T0 + dt.timedelta(minutes=1)),
+            _purchase("AAPL", "Apple", "3", T0 + dt.timedelta(minutes=1)),
+            _purchase("AAPL", "Apple Inc.", "4", T0 + dt.timedelta(minutes=2)),
+            _purchase("AAPL", "Apple Inc.", "5", T0 + dt.timedelta(minutes=3)),
+        ]
+        _purchase("MSFT", "Microsoft", "9", T0 + dt.timedelta(minutes=5))
+
+    def test_walks_all_rows_newest_first_without_overlap(self):
+        seen, cursor = [], None
+        while True:
+            page = list_purchases("aapl", cursor, limit=2)
+            seen.extend(r["id"] for r in page["results"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, [self.ids[4], self.ids[3], self.ids[2], self.ids[1], self.ids[0]])
+
+    def test_last_page_has_no_cursor(self):
+        page = list_purchases("AAPL", limit=5)
+        self.assertEqual(len(page["results"]), 5)
+        self.assertIsNone(page["next_cursor"])
+        self.assertEqual(page["results"][0]["amount"], 5.0)
+
+    def test_cursor_query_has_an_index_range_bound(self):
+        with CaptureQueriesContext(connection) as queries:
+            list_purchases("AAPL", encode_cursor(T0, self.ids[0]))
+        self.assertIn('"created_at" <= ', queries[-1]["sql"])
+
+    def test_reads_the_primary_right_after_a_purchase(self):
+        with patch("stocks.services.purchases.pin_primary", wraps=pin_primary) as pin, \
+                patch("stocks.services.purchases.recently_written", side_effect=[False, True]) as written:
+            list_purchases("aapl")
+            page = list_purchases("aapl")
+
+        self.assertEqual([c.args for c in pin.call_args_list], [(False,), (True,)])
+        written.assert_called_with("AAPL")
+        self.assertEqual(len(page["results"]), 5)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            list_purchases("AAPL", "not-a-cursor")
+
+    def test_latest_company_name_is_the_newest_row(self):
+        self.assertEqual(_latest_company_name("aapl"), "Apple Inc.")
+
+
+class StockPurchasesViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.pk = _purchase("AAPL", "Apple Inc.", "2.5", T0)
+
+    def test_lists_purchases(self):
+        resp = self.client.get("/api/stock/aapl/purchases/")
+        self.assertEqual(resp.status_code, 200)
+        body = resp.json()
+        self.assertEqual(body["company_code"], "AAPL")
+        self.assertEqual(body["results"][0]["id"], self.pk)
+        self.assertIsNone(body["next_cursor"])
+
+    def test_cursor_past_last_row_is_empty(self):
+        resp = self.client.get(f"/api/stock/AAPL/purchases/?cursor={encode_cursor(T0, self.pk)}")
+        self.assertEqual(resp.json()["results"], [])
+
+    def test_bad_params_400(self):
+        self.assertEqual(self.client.get("/api/stock/AAPL/purchases/?limit=x").status_code, 400)
+        self.assertEqual(self.client.get("/api/stock/AAPL/purchases/?cursor=%%%").status_code, 400)
@@ -0,0 +1,219 @@
+import json
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from rest_framework.test import APIClient
+
+from stocks.services import quote_stream
+from stocks.services.quote_stream import QuoteHub, changed_fields, stream_events
+
+PAYLOAD = {
+    "status": "ok",
+    "company_code": "AAPL",
+    "purchased_amount": 2.5,
+    "stock_values": {"open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5},
+}
+
+
+class _FakeFetch:
+    def __init__(self):
+        self.responses = {}
+        self.calls = []
+
+    def __call__(self, symbol):
+        self.calls.append(symbol)
+        return self.responses[symbol]
+
+
+class ChangedFieldsTests(SimpleTestCase):
+    def test_only_changed_top_level_and_nested_fields(self):
+        new = dict(PAYLOAD, purchased_amount=3.0,
+                   stock_values=dict(PAYLOAD["stock_values"], close=1.7))
+        self.assertEqual(changed_fields(PAYLOAD, new),
+                         {"purchased_amount": 3.0, "stock_values": {"close": 1.7}})
+
+    def test_no_changes(self):
+        self.assertEqual(changed_fields(PAYLOAD, dict(PAYLOAD)), {})
+
+
+class QuoteHubTests(SimpleTestCase):
+    def setUp(self):
+        self.fetch = _FakeFetch()
+        self.fetch.responses["AAPL"] = (dict(PAYLOAD), 200)
+        self.hub = QuoteHub(fetch=self.fetch, autostart=False)
+
+    def _events(self, sub):
+        out = []
+        while not sub.events.empty():
+            out.append(sub.events.get_nowait())
+        return out
+
+    def test_one_poller_per_symbol_shared_by_subscribers(self):
+        a = self.hub.subscribe(["aapl"])
+        b = self.hub.subscribe(["AAPL"])
+        self.assertEqual(self.hub.active_symbols(), ["AAPL"])
+
+        self.hub._pollers["AAPL"].poll_once()
+
+        self.assertEqual(self.fetch.calls, ["AAPL"])
+        for sub in (a, b):
+            [event] = self._events(sub)
+            self.assertEqual(event["event"], "snapshot")
+            self.assertEqual(event["data"]["payload"], PAYLOAD)
+
+    def test_updates_carry_only_changes_and_are_skipped_when_unchanged(self):
+        sub = self.hub.subscribe(["AAPL"])
+        poller = self.hub._pollers["AAPL"]
+        poller.poll_once()
+        self._events(sub)
+
+        poller.poll_once()
+        self.assertEqual(self._events(sub), [])
+
+        self.fetch.responses["AAPL"] = (dict(PAYLOAD, purchased_amount=4.0), 200)
+        poller.poll_once()
+        [event] = self._events(sub)
+        self.assertEqual(event["event"], "update")
+        self.assertEqual(event["data"]["changes"], {"purchased_amount": 4.0})
+
+    def test_late_joiner_gets_snapshot(self):
+        self.hub.subscribe(["AAPL"])
+        self.hub._pollers["AAPL"].poll_once()
+
+        late = self.hub.subscribe(["AAPL"])
+        [event] = self._events(late)
+        self.assertEqual(event["event"], "snapshot")
+
+    def test_errors_are_sent_once_per_transition(self):
+        self.fetch.responses["AAPL"] = ({"status": "error", "error": "down"}, 503)
+        sub = self.hub.subscribe(["AAPL"])
+        poller = self.hub._pollers["AAPL"]
+        poller.poll_once()
+        poller.poll_once()
+
+        [event] = self._events(sub)
+        self.assertEqual(event["event"], "error")
+        self.assertEqual(event["data"]["status"], 503)
+
+    def test_unknown_ticker_stops_its_poller(self):
+        self.fetch.responses["NOPE"] = ({"status": "error", "error": "invalid or unknown ticker"}, 400)
+        sub = self.hub.subscribe(["NOPE"])
+        poller = self.hub._pollers["NOPE"]
+        poller.poll_once()
+
+        self.assertTrue(poller._stop_event.is_set())
+        [event] = self._events(sub)
+        self.assertEqual(event["data"]["status"], 400)
+
+        late = self.hub.subscribe(["NOPE"])
+        [event] = self._events(late)
+        self.assertEqual(event["event"], "error")
+        self.assertEqual(self.fetch.calls, ["NOPE"])
+
+    def test_poller_thread_recycles_and_closes_db_connections(self):
+        poller = quote_stream.SymbolPoller(self.hub, "AAPL")
+        poller.poll_once = poller.stop
+        with patch("stocks.services.quote_stream.close_old_connections") as close_old, \
+                patch("stocks.services.quote_stream.connections") as conns:
+            poller.run()
+        close_old.assert_called_once_with()
+        conns.close_all.assert_called_once_with()
+
+    def test_last_unsubscribe_stops_poller(self):
+        a = self.hub.subscribe(["AAPL"])
+        b = self.hub.subscribe(["AAPL"])
+        poller = self.hub._pollers["AAPL"]
+
+        self.hub.unsubscribe(a)
+        self.assertEqual(self.hub.active_symbols(), ["AAPL"])
+        self.hub.unsubscribe(b)
+        self.assertEqual(self.hub.active_symbols(), [])
+        self.assertTrue(poller._stop_event.is_set())
+
+    def test_stream_events_formats_sse_and_releases_subscription(self):
+        sub = self.hub.subscribe(["AAPL"])
+        self.hub._pollers["AAPL"].poll_once()
+
+        frames = stream_events(self.hub, sub, heartbeat=0.01, max_seconds=0.05)
+        self.assertTrue(next(frames).startswith("retry:"))
+        snapshot = next(frames)
+        self.assertIn("event: snapshot\n", snapshot)
+        data = json.loads(snapshot.split("data: ", 1)[1])
+        self.assertEqual(data["symbol"], "AAPL")
+        self.assertEqual(next(frames), ": keep-alive\n\n")
+
+        frames.close()
+        self.assertEqual(self.hub.active_symbols(), [])
+
+
+class QuoteStreamViewTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_symbols_required(self):
+        resp = self.client.get("/api/stream/", HTTP_ACCEPT="application/json")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("symbols is required", resp.json()["error"])
+
+    def test_too_many_symbols(self):
+        symbols = ",".join(f"T{i}" for i in range(50))
+        resp = self.client.get(f"/api/stream/?symbols={symbols}", HTTP_ACCEPT="application/json")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_malformed_symbols_rejected_before_subscribing(self):
+        with patch("stocks.views.get_quote_hub") as get_hub:
+            resp = self.client.get("/api/stream/?symbols=AAPL,<script>,12AB", HTTP_ACCEPT="application/json")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("12AB", resp.json()["error"])
+        get_hub.assert_not_called()
+        self.assertTrue(quote_stream.is_valid_symbol("BRK.B"))
+
+    def test_streams_snapshot_as_event_stream(self):
+        fetch = _FakeFetch()
+        fetch.responses["AAPL"] = (dict(PAYLOAD), 200)
+        hub = QuoteHub(fetch=fetch, interval=60)
+
+        with patch("stocks.views.get_quote_hub", return_value=hub):
+            resp = self.client.get("/api/stream/?symbols=aapl", HTTP_ACCEPT="text/event-stream")
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp["Content-Type"], "text/event-stream")
+            chunks = iter(resp.streaming_content)
+            next(chunks)  # retry
+            self.assertIn(b"event: snapshot", next(chunks))
+            resp.close()
+
+        self.assertEqual(hub.active_symbols(), [])
+
+    def test_response_closed_before_streaming_leaves_no_poller(self):
+        fetch = _FakeFetch()
+        hub = QuoteHub(fetch=fetch, interval=60)
+
+        with patch("stocks.views.get_quote_hub", return_value=hub):
+            resp = self.client.get("/api/stream/?symbols=aapl", HTTP_ACCEPT="text/event-stream")
+            self.assertEqual(resp.status_code, 200)
+            resp.close()
+
+        self.assertEqual(hub.active_symbols(), [])
+        self.assertEqual(fetch.calls, [])
+        self.assertEqual(quote_stream._open_streams, 0)
+
+    def test_rejects_streams_beyond_the_per_process_limit(self):
+        hub = QuoteHub(fetch=_FakeFetch(), interval=60)
+
+        with patch.object(quote_stream, "MAX_OPEN_STREAMS", 1), \
+                patch("stocks.views.get_quote_hub", return_value=hub):
+            first = self.client.get("/api/stream/?symbols=aapl", HTTP_ACCEPT="text/event-stream")
+            self.assertEqual(first.status_code, 200)
+
+            busy = self.client.get("/api/stream/?symbols=msft", HTTP_ACCEPT="application/json")
+            self.assertEqual(busy.status_code, 503)
+            self.assertEqual(busy["Retry-After"], "5")
+
+            first.close()
+            again = self.client.get("/api/stream/?symbols=msft", HTTP_ACCEPT="text/event-stream")
+            self.assertEqual(again.status_code, 200)
+            again.close()
+
+        self.assertEqual(quote_stream._open_streams, 0)
@@ -0,0 +1,26 @@
+import datetime as dt
+import uuid
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+
+from stocks.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_matches_drf_json_renderer(self):
+        data = {
+            "created_at": dt.datetime(2025, 8, 20, 12, 0, 0, 123456, tzinfo=dt.timezone.utc),
+            "naive": dt.datetime(2025, 8, 20, 12, 0),
+            "date": dt.date(2025, 8, 20),
+            "time": dt.time(9, 30),
+            "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "amount": Decimal("2.50"),
+            1: "non-str key",
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_utc_datetimes_use_z_suffix(self):
+        body = FastJSONRenderer().render({"at": dt.datetime(2025, 8, 20, 12, tzinfo=dt.timezone.utc)})
+        self.assertEqual(body, b'{"at":"2025-08-20T12:00:00Z"}')
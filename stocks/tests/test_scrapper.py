@@ -48,6 +48,14 @@ class GetScrappingDataTests(SimpleTestCase):
 
         self.assertTrue(all(v is None for v in data["performance"].values()))
         self.assertEqual(data["competitors"], [])
+        self.assertFalse(data["ok"])
+
+    @patch("stocks.services.marketwatch_scraper.requests.get",
+           side_effect=mw.requests.ConnectionError("down"))
+    def test_network_error_returns_empty_defaults(self, _get):
+        data = mw.get_scrapping_data("AAPL")
+        self.assertFalse(data["ok"])
+        self.assertEqual(data["competitors"], [])
 
     @patch("stocks.services.marketwatch_scraper.requests.get")
     def test_missing_sections_does_not_crash(self, mock_get):
@@ -58,3 +66,20 @@ class GetScrappingDataTests(SimpleTestCase):
 
         self.assertTrue(all(v is None for v in data["performance"].values()))
         self.assertEqual(data["competitors"], [])
+
+    @patch("stocks.services.marketwatch_scraper.requests.get")
+    def test_competitor_tickers_from_quote_links(self, mock_get):
+        mock_get.return_value = Mock(text="""
+            <html><body><h2>Competitors</h2><table>
+              <thead><tr><th>Name</th><th>Chg %</th><th>Market Cap</th></tr></thead>
+              <tbody>
+                <tr><td><a href="/investing/stock/msft?mod=mw_quote_competitors">Microsoft Corp.</a></td>
+                    <td>1%</td><td>$3.75T</td></tr>
+                <tr><td><a href="/investing/stock/005930?countrycode=kr">Samsung</a></td>
+                    <td>1%</td><td>₩465.45T</td></tr>
+                <tr><td>Unlinked Co.</td><td>1%</td><td>$1B</td></tr>
+              </tbody></table></body></html>""")
+
+        data = mw.get_scrapping_data("AAPL")
+
+        self.assertEqual([c["symbol"] for c in data["competitors"]], ["MSFT", None, None])
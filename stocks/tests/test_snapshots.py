@@ -0,0 +1,103 @@
+import datetime as dt
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from stocks.models import ScrapeSnapshot
+from stocks.services import snapshots, stock_service
+
+OK = {"ok": True, "performance": {"five_days": 1.5}, "competitors": [{"name": "Microsoft"}]}
+BLOCKED = {"ok": False, "performance": {}, "competitors": []}
+
+
+def _snapshot(symbol, age_seconds, five_days=1.0):
+    snap = ScrapeSnapshot.objects.create(company_code=symbol, performance={"five_days": five_days})
+    ScrapeSnapshot.objects.filter(pk=snap.pk).update(
+        scraped_at=snap.scraped_at - dt.timedelta(seconds=age_seconds))
+    return snap
+
+
+@patch("stocks.services.stock_service.SCRAPING_ENABLED", True)
+@patch("stocks.services.snapshots.INLINE_ON_COLD_START", True)
+@patch("stocks.services.snapshots.MAX_AGE", 900)
+class ScrapeStageTests(TestCase):
+    @patch("stocks.services.stock_service.get_scrapping_data")
+    def test_fresh_snapshot_is_served_without_scraping(self, scrap):
+        _snapshot("AAPL", 60, five_days=2.0)
+
+        data = stock_service._stage_scrape("AAPL")
+
+        scrap.assert_not_called()
+        self.assertEqual(data["performance_data"]["five_days"], 2.0)
+        self.assertIsNotNone(data["scraped_at"])
+
+    @patch("stocks.services.stock_service.get_scrapping_data", return_value=OK)
+    def test_cold_start_scrapes_inline_and_persists(self, scrap):
+        data = stock_service._stage_scrape("AAPL")
+
+        scrap.assert_called_once_with("AAPL")
+        self.assertEqual(data["competitors"], [{"name": "Microsoft"}])
+        self.assertEqual(ScrapeSnapshot.objects.filter(company_code="AAPL").count(), 1)
+
+    @patch("stocks.services.stock_service.get_scrapping_data")
+    def test_stale_snapshot_is_served_without_scraping(self, scrap):
+        old = _snapshot("AAPL", 7200, five_days=3.0)
+
+        with self.assertLogs("stocks.services.stock_service", "WARNING"):
+            data = stock_service._stage_scrape("AAPL")
+
+        scrap.assert_not_called()
+        self.assertEqual(data["performance_data"]["five_days"], 3.0)
+        old.refresh_from_db()
+        self.assertEqual(data["scraped_at"], snapshots.as_of(old))
+
+    @patch("stocks.services.stock_service.get_scrapping_data", return_value=BLOCKED)
+    def test_blocked_scrape_without_snapshot_degrades_to_empty(self, _scrap):
+        data = stock_service._stage_scrape("AAPL")
+        self.assertTrue(all(v is None for v in data["performance_data"].values()))
+        self.assertEqual(data["competitors"], [])
+        self.assertIsNone(data["scraped_at"])
+        self.assertEqual(ScrapeSnapshot.objects.count(), 0)  # failure not stored
+
+    @patch("stocks.services.stock_service.PolygonClient")
+    @patch("stocks.services.stock_service.get_scrapping_data", return_value=BLOCKED)
+    def test_blank_cold_start_is_not_cached_past_the_next_snapshot(self, _scrap, poly):
+        stock_service.cache.clear()
+        poly.return_value.get_company_info.return_value = {"name": "Apple Inc."}
+        poly.return_value.last_trading_day.return_value = dt.date(2025, 8, 22)
+        poly.return_value.get_daily_data.return_value = {"_polygon_status": "OK", "date": "2025-08-22"}
+
+        data, _ = stock_service.get_payload_cached("AAPL")
+        self.assertIsNone(data["scraped_at"])
+        self.assertIsNone(stock_service.cache.get(stock_service._stage_key("AAPL", "scrape")))
+
+        _snapshot("AAPL", 60, five_days=4.0)  # refresh_scrapes catches up
+        stock_service.bust_cache("AAPL")
+        data, _ = stock_service.get_payload_cached("AAPL")
+        self.assertEqual(data["performance_data"]["five_days"], 4.0)
+
+    @patch("stocks.services.stock_service.get_scrapping_data")
+    def test_inline_scrape_can_be_disabled(self, scrap):
+        with patch("stocks.services.snapshots.INLINE_ON_COLD_START", False):
+            stock_service._stage_scrape("AAPL")
+        scrap.assert_not_called()
+
+
+class RefreshScrapesCommandTests(TestCase):
+    @patch("stocks.services.marketwatch_scraper.get_scrapping_data", return_value=OK)
+    def test_refreshes_known_symbols_and_prunes(self, scrap):
+        for age in (300, 200, 100):
+            _snapshot("MSFT", age)
+
+        call_command("refresh_scrapes", "--pause", "0", "--keep", "2", stdout=None)
+
+        scrap.assert_called_once_with("MSFT")
+        self.assertEqual(ScrapeSnapshot.objects.filter(company_code="MSFT").count(), 2)
+        self.assertEqual(snapshots.latest_snapshot("MSFT").performance, OK["performance"])
+
+    @patch("stocks.services.marketwatch_scraper.get_scrapping_data", return_value=BLOCKED)
+    def test_failed_refresh_keeps_last_snapshot(self, _scrap):
+        _snapshot("AAPL", 100)
+        call_command("refresh_scrapes", "AAPL", "--pause", "0")
+        self.assertEqual(ScrapeSnapshot.objects.filter(company_code="AAPL").count(), 1)
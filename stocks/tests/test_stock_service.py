@@ -1,10 +1,19 @@
 import datetime as dt
+import gzip
+import json
+import os
+import subprocess
+import sys
 from decimal import Decimal
 from unittest.mock import patch
-from django.test import TestCase
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
 
 from stocks.models import Stock
-from stocks.services.stock_service import build_payload
+from stocks.services import stock_service
+from stocks.services.polygon_client import PolygonClient
+from stocks.services.stock_service import build_payload, get_payload_cached, RenderedPayload
+from stocks.tests import test_polygon
 
 
 class BuildPayloadTests(TestCase):
@@ -66,4 +75,147 @@ class BuildPayloadTests(TestCase):
 
         self.assertEqual(http, 503)
         self.assertEqual(data["status"], "error")
-        self.assertIn("could not retrieve recent OHLC data", data["error"])
\ No newline at end of file
+        self.assertIn("could not retrieve recent OHLC data", data["error"])
+
+class GetPayloadCachedTests(TestCase):
+    def setUp(self):
+        stock_service.cache.clear()
+
+    @patch("stocks.services.stock_service.build_payload",
+           return_value=({"status": "ok", "company_code": "AAPL", "purchased_amount": 2.5}, 200))
+    def test_caches_rendered_bytes_and_serves_hits_without_rebuilding(self, build):
+        first, http = get_payload_cached("AAPL")
+        second, _ = get_payload_cached("aapl")
+
+        self.assertEqual(http, 200)
+        self.assertEqual(build.call_count, 1)
+        self.assertIsInstance(second, RenderedPayload)
+        self.assertEqual(json.loads(second.body), first)
+
+    @patch("stocks.services.stock_service.build_payload",
+           return_value=({"status": "error", "error": "invalid or unknown ticker"}, 400))
+    def test_errors_are_not_cached(self, build):
+        get_payload_cached("XXXX")
+        data, http = get_payload_cached("XXXX")
+        self.assertEqual(http, 400)
+        self.assertNotIsInstance(data, RenderedPayload)
+        self.assertEqual(build.call_count, 2)
+
+    def test_render_payload_precompresses_large_bodies(self):
+        rendered = stock_service.render_payload({"competitors": [{"name": "X" * 300}]})
+        self.assertEqual(json.loads(rendered.body)["competitors"][0]["name"], "X" * 300)
+        self.assertEqual(gzip.decompress(rendered.gzip_body), rendered.body)
+
+
+@patch("stocks.services.stock_service.TTL", 300)
+@patch("stocks.services.stock_service.CLOSED_MAX_TTL", 0)
+class PayloadTtlTests(SimpleTestCase):
+    def _ttl(self, *, open_, trading_day, rollover, until_open=10 ** 6, request_date="2025-08-22", **payload):
+        with patch.object(PolygonClient, "is_market_open", return_value=open_), \
+             patch.object(PolygonClient, "last_trading_day", return_value=trading_day), \
+             patch.object(PolygonClient, "seconds_until_rollover", return_value=rollover), \
+             patch.object(PolygonClient, "seconds_until_open", return_value=until_open):
+            return stock_service.payload_ttl({"request_date": request_date, **payload})
+
+    def test_short_ttl_while_market_open(self):
+        self.assertEqual(self._ttl(open_=True, trading_day=dt.date(2025, 8, 22), rollover=3600), 300)
+
+    def test_after_close_caches_until_rollover(self):
+        self.assertEqual(self._ttl(open_=False, trading_day=dt.date(2025, 8, 22), rollover=255600), 255600)
+
+    def test_closed_ttl_ends_at_next_open(self):
+        self.assertEqual(
+            self._ttl(open_=False, trading_day=dt.date(2025, 8, 22), rollover=255600, until_open=230400),
+            230400)
+
+    def test_pre_market_build_expires_at_the_open(self):
+        with test_polygon.LastTradingDayTests._freeze_et(self, 2025, 8, 20, 13):  # wednesday 09:00 ET
+            ttl = stock_service.payload_ttl({"request_date": "2025-08-19"})
+        self.assertEqual(ttl, 1800)
+
+    def test_fallback_ohlc_date_keeps_short_ttl(self):
+        self.assertEqual(self._ttl(open_=False, trading_day=dt.date(2025, 8, 25), rollover=3600), 300)
+
+    @patch("stocks.services.stock_service.SCRAPING_ENABLED", True)
+    def test_payload_without_snapshot_keeps_short_ttl(self):
+        self.assertEqual(
+            self._ttl(open_=False, trading_day=dt.date(2025, 8, 22), rollover=255600, scraped_at=None), 300)
+
+    def test_closed_ttl_cap(self):
+        with patch("stocks.services.stock_service.CLOSED_MAX_TTL", 7200):
+            self.assertEqual(self._ttl(open_=False, trading_day=dt.date(2025, 8, 22), rollover=255600), 7200)
+
+
+class FieldSelectionTests(TestCase):
+    def setUp(self):
+        stock_service.cache.clear()
+        Stock.objects.create(company_code="AAPL", company_name="Apple Inc.", amount=Decimal("2.5"))
+
+        patcher = patch("stocks.services.stock_service.PolygonClient")
+        self.poly = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.poly.last_trading_day.return_value = dt.date(2025, 8, 22)
+        self.poly.get_daily_data.return_value = {
+            "_polygon_status": "OK",
+            "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "date": "2025-08-22",
+        }
+
+        patcher = patch("stocks.services.stock_service.get_scrapping_data",
+                        return_value={"performance": {"five_days": 1.0}, "competitors": []})
+        self.scrap = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_parse_fields(self):
+        self.assertIsNone(stock_service.parse_fields(""))
+        self.assertEqual(stock_service.parse_fields("stock_values, purchased_amount"),
+                         {"stock_values", "purchased_amount"})
+        with self.assertRaisesMessage(ValueError, "bogus"):
+            stock_service.parse_fields("stock_values,bogus")
+
+    def test_position_only_skips_polygon_ohlc_and_scrape(self):
+        data, http = build_payload("AAPL", {"purchased_amount"})
+
+        self.assertEqual(http, 200)
+        self.assertEqual(data, {"status": "ok", "purchased_amount": 2.5, "company_code": "AAPL"})
+        self.poly.get_daily_data.assert_not_called()
+        self.scrap.assert_not_called()
+
+    def test_stock_values_skips_scrape(self):
+        data, _ = build_payload("AAPL", {"stock_values"})
+        self.assertEqual(data["stock_values"]["close"], 1.5)
+        self.assertNotIn("performance_data", data)
+        self.scrap.assert_not_called()
+
+    def test_full_request_reuses_cached_partial_stages(self):
+        get_payload_cached("AAPL", {"stock_values"})
+        data, http = get_payload_cached("AAPL")
+
+        self.assertEqual(http, 200)
+        self.assertEqual(data["stock_values"]["close"], 1.5)
+        self.assertEqual(data["performance_data"]["five_days"], 1.0)
+        self.assertEqual(self.poly.get_daily_data.call_count, 1)
+        self.assertEqual(self.scrap.call_count, 1)
+
+    def test_partial_request_projects_cached_full_payload(self):
+        get_payload_cached("AAPL")
+        data, _ = get_payload_cached("AAPL", {"competitors"})
+
+        self.assertEqual(data, {"status": "ok", "company_code": "AAPL", "competitors": []})
+        self.assertEqual(self.scrap.call_count, 1)
+
+
+class LazyScraperTests(SimpleTestCase):
+    @patch("stocks.services.stock_service.SCRAPING_ENABLED", False)
+    @patch("stocks.services.stock_service.get_scrapping_data")
+    def test_scraping_disabled_keeps_empty_defaults(self, scrap):
+        data = stock_service._stage_scrape("AAPL")
+        scrap.assert_not_called()
+        self.assertEqual(data["competitors"], [])
+        self.assertTrue(all(v is None for v in data["performance_data"].values()))
+
+    def test_views_import_does_not_load_parser_stack(self):
+        code = ("import django, sys; django.setup(); import server.urls; "
+                "sys.exit(1 if {'bs4', 'lxml'} & set(sys.modules) else 0)")
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE="server.settings")
+        result = subprocess.run([sys.executable, "-c", code], env=env, cwd=settings.BASE_DIR)
+        self.assertEqual(result.returncode, 0)
@@ -0,0 +1,129 @@
+from unittest.mock import patch, Mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from rest_framework.test import APIClient
+
+from stocks.throttling import GCRAThrottle, ScopedGCRAThrottle
+
+BASE = "/api/stock"
+RATES = {"anon": "1000/min", "stock_read": "3/min", "stock_write": "2/min"}
+
+
+class _Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _request(method="GET", ip="10.0.0.1"):
+    req = Mock()
+    req.method = method
+    req.META = {"REMOTE_ADDR": ip}
+    req.user = None
+    return req
+
+
+@patch.object(GCRAThrottle, "THROTTLE_RATES", RATES)
+class ScopedGCRAThrottleTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.clock = _Clock()
+        self.view = Mock(throttle_scope="stock")
+
+    def _allow(self, method="GET", ip="10.0.0.1"):
+        throttle = ScopedGCRAThrottle()
+        throttle.timer = self.clock
+        return throttle.allow_request(_request(method, ip), self.view), throttle
+
+    def test_burst_then_deny_with_retry_after(self):
+        results = [self._allow()[0] for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+
+        _, throttle = self._allow()
+        self.assertAlmostEqual(throttle.wait(), 20.0)  # 60s / 3 requests
+
+    def test_refills_at_sustained_rate(self):
+        for _ in range(3):
+            self._allow()
+        self.assertFalse(self._allow()[0])
+
+        self.clock.now += 20
+        self.assertTrue(self._allow()[0])
+        self.assertFalse(self._allow()[0])
+
+    def test_reads_and_writes_use_separate_buckets(self):
+        for _ in range(3):
+            self._allow("GET")
+        self.assertFalse(self._allow("GET")[0])
+
+        self.assertTrue(self._allow("POST")[0])
+        self.assertTrue(self._allow("POST")[0])
+        self.assertFalse(self._allow("POST")[0])
+
+    def test_clients_are_isolated(self):
+        for _ in range(3):
+            self._allow(ip="10.0.0.1")
+        self.assertFalse(self._allow(ip="10.0.0.1")[0])
+        self.assertTrue(self._allow(ip="10.0.0.2")[0])
+
+    def test_state_is_a_single_timestamp(self):
+        _, throttle = self._allow()
+        self._allow()
+        self.assertIsInstance(cache.get(throttle.key), float)
+
+    def test_lock_contention_is_not_a_rate_limit(self):
+        _, throttle = self._allow()
+        cache.add(f"{throttle.key}:lock", 1, 1)
+
+        with patch("stocks.throttling.time.sleep") as sleep:
+            allowed, throttle = self._allow()
+            self.assertTrue(allowed)
+            self.assertTrue(self._allow()[0])
+            self.assertFalse(self._allow()[0])  # still counted: the bucket holds 3
+
+        self.assertEqual(sleep.call_count, 3 * (GCRAThrottle.lock_attempts - 1))
+
+    def test_lock_released_mid_retry_is_taken(self):
+        _, throttle = self._allow()
+        lock = f"{throttle.key}:lock"
+        cache.add(lock, 1, 1)
+
+        with patch("stocks.throttling.time.sleep", side_effect=lambda _: cache.delete(lock)) as sleep:
+            allowed, _ = self._allow()
+
+        self.assertTrue(allowed)
+        sleep.assert_called_once_with(GCRAThrottle.lock_backoff)
+        self.assertIsNone(cache.get(lock))
+
+    def test_redis_backend_updates_atomically_in_lua(self):
+        script = Mock(side_effect=[[1, b""], [0, b"19.5"]])
+        client = Mock(register_script=Mock(return_value=script))
+        with patch.object(GCRAThrottle, "_redis_client", return_value=client):
+            first, _ = self._allow()
+            second, throttle = self._allow()
+
+        self.assertEqual((first, second), (True, False))
+        self.assertEqual(throttle.wait(), 19.5)
+        keys = script.call_args.kwargs["keys"]
+        self.assertEqual(keys, [cache.make_and_validate_key(throttle.key)])
+        self.assertEqual(script.call_args.kwargs["args"], [repr(self.clock.now), "20.0", "40.0"])
+        self.assertIsNone(cache.get(f"{throttle.key}:lock"))
+
+    def test_view_without_scope_is_not_throttled(self):
+        throttle = ScopedGCRAThrottle()
+        self.assertTrue(throttle.allow_request(_request(), Mock(spec=[])))
+
+
+@patch.object(GCRAThrottle, "THROTTLE_RATES", RATES)
+class StockViewThrottleTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    @patch("stocks.views.get_payload_cached", return_value=({"status": "ok"}, 200))
+    def test_get_returns_429_once_read_bucket_is_empty(self, _cached):
+        codes = [self.client.get(f"{BASE}/AAPL/").status_code for _ in range(4)]
+        self.assertEqual(codes, [200, 200, 200, 429])
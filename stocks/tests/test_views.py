@@ -1,4 +1,6 @@
 # stocks/tests/test_views.py
+import gzip
+import time
 from decimal import Decimal
 from unittest.mock import patch
 
@@ -6,6 +8,8 @@ from django.test import TestCase
 from rest_framework.test import APIClient
 
 from stocks.models import Stock
+from stocks.services.stock_service import RenderedPayload
+from stocks.views import _accepts_gzip
 
 BASE = "/api/stock"
 
@@ -19,7 +23,7 @@ class StockViewGetTests(TestCase):
         resp = self.client.get(f"{BASE}/AAPL/")
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.json()["status"], "ok")
-        get_cached.assert_called_once_with("AAPL")
+        get_cached.assert_called_once_with("AAPL", None)
 
     @patch("stocks.views.get_payload_cached",
            return_value=({"status": "error", "error": "invalid"}, 400))
@@ -27,7 +31,21 @@ class StockViewGetTests(TestCase):
         resp = self.client.get(f"{BASE}/XXXX/")
         self.assertEqual(resp.status_code, 400)
         self.assertEqual(resp.json()["status"], "error")
-        get_cached.assert_called_once_with("XXXX")
+        get_cached.assert_called_once_with("XXXX", None)
+
+    @patch("stocks.views.get_payload_cached",
+           return_value=({"status": "ok", "company_code": "AAPL", "stock_values": {}}, 200))
+    def test_get_fields_are_passed_to_service(self, get_cached):
+        resp = self.client.get(f"{BASE}/AAPL/?fields=stock_values,purchased_amount")
+        self.assertEqual(resp.status_code, 200)
+        get_cached.assert_called_once_with("AAPL", frozenset({"stock_values", "purchased_amount"}))
+
+    @patch("stocks.views.get_payload_cached")
+    def test_get_unknown_field_400(self, get_cached):
+        resp = self.client.get(f"{BASE}/AAPL/?fields=stock_values,nope")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("nope", resp.json()["error"])
+        get_cached.assert_not_called()
 
 
 class StockViewPostTests(TestCase):
@@ -98,3 +116,85 @@ class StockViewPostTests(TestCase):
         resp = self.client.post(f"{BASE}/AAPL/", data={"amount": "1"}, format="json")
         self.assertEqual(resp.status_code, 503)
         self.assertIn("upstream provider unavailable", resp.json()["error"])
+
+
+class StockViewRenderedPayloadTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        body = b'{"status":"ok","company_code":"AAPL"}'
+        self.payload = RenderedPayload({"status": "ok", "company_code": "AAPL"},
+                                       body, gzip.compress(body), expires_at=time.time() + 120)
+
+    def test_cached_bytes_are_written_as_is(self):
+        with patch("stocks.views.get_payload_cached", return_value=(self.payload, 200)):
+            resp = self.client.get(f"{BASE}/AAPL/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "application/json")
+        self.assertEqual(resp.content, self.payload.body)
+        self.assertIn("Accept-Encoding", resp["Vary"])
+
+    def test_gzip_body_served_when_accepted(self):
+        with patch("stocks.views.get_payload_cached", return_value=(self.payload, 200)):
+            resp = self.client.get(f"{BASE}/AAPL/", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(resp.content), self.payload.body)
+
+    def test_gzip_refused_with_zero_quality(self):
+        with patch("stocks.views.get_payload_cached", return_value=(self.payload, 200)):
+            resp = self.client.get(f"{BASE}/AAPL/", HTTP_ACCEPT_ENCODING="gzip;q=0, deflate")
+        self.assertFalse(resp.has_header("Content-Encoding"))
+        self.assertEqual(resp.content, self.payload.body)
+
+    def test_accept_encoding_q_values(self):
+        cases = {
+            "gzip": True,
+            "deflate, gzip;q=0.5": True,
+            "GZIP; Q=1.0": True,
+            "gzip;q=0": False,
+            "gzip;q=0.000": False,
+            "*": True,
+            "*;q=0": False,
+            "*, gzip;q=0": False,
+            "identity": False,
+            "": False,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(_accepts_gzip(header), expected)
+
+    def test_etag_and_cache_control_from_remaining_ttl(self):
+        with patch("stocks.views.get_payload_cached", return_value=(self.payload, 200)):
+            resp = self.client.get(f"{BASE}/AAPL/")
+        self.assertEqual(resp["ETag"], self.payload.etag)
+        self.assertFalse(resp["ETag"].startswith("W/"))
+        self.assertRegex(resp["Cache-Control"], r"max-age=1(19|20)\b")
+        self.assertIn("stale-while-revalidate=", resp["Cache-Control"])
+
+    @patch("stocks.views.TTL", 300)
+    def test_client_max_age_is_capped_at_the_short_ttl(self):
+        self.payload.expires_at = time.time() + 71 * 3600  # after-hours server-side entry
+        with patch("stocks.views.get_payload_cached", return_value=(self.payload, 200)):
+            resp = self.client.get(f"{BASE}/AAPL/")
+        self.assertRegex(resp["Cache-Control"], r"max-age=300\b")
+
+    def test_if_none_match_returns_304_without_body(self):
+        with patch("stocks.views.get_payload_cached", return_value=(self.payload, 200)):
+            resp = self.client.get(f"{BASE}/AAPL/", HTTP_IF_NONE_MATCH=self.payload.etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.content, b"")
+        self.assertEqual(resp["ETag"], self.payload.etag)
+
+    def test_stale_etag_gets_full_body(self):
+        with patch("stocks.views.get_payload_cached", return_value=(self.payload, 200)):
+            resp = self.client.get(f"{BASE}/AAPL/", HTTP_IF_NONE_MATCH='"outdated"')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content, self.payload.body)
+
+    def test_gzip_variant_has_its_own_etag(self):
+        with patch("stocks.views.get_payload_cached", return_value=(self.payload, 200)):
+            plain = self.client.get(f"{BASE}/AAPL/")
+            gz = self.client.get(f"{BASE}/AAPL/", HTTP_ACCEPT_ENCODING="gzip")
+            revalidated = self.client.get(f"{BASE}/AAPL/", HTTP_ACCEPT_ENCODING="gzip",
+                                          HTTP_IF_NONE_MATCH=gz["ETag"])
+        self.assertNotEqual(plain["ETag"], gz["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
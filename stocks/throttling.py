@@ -0,0 +1,199 @@
+import time
+import logging
+from typing import Optional, Tuple
+
+from django.core.cache import cache as default_cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+log = logging.getLogger(__name__)
+
+_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# GCRA step run server-side on Redis, so the read-modify-write is atomic.
+# Returns {1, ""} when allowed, {0, retry_after} when not.
+_GCRA_LUA = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local tolerance = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local allow_at = tat - tolerance
+if now < allow_at then
+    return {0, tostring(allow_at - now)}
+end
+local new_tat = tat + interval
+redis.call('SET', KEYS[1], tostring(new_tat), 'EX', math.max(1, math.floor(new_tat - now) + 1))
+return {1, ''}
+"""
+
+
+class GCRAThrottle(BaseThrottle):
+    """
+    Generic Cell Rate Algorithm (a.k.a. leaky/token bucket) throttle.
+
+    Unlike DRF's SimpleRateThrottle, which keeps a list with one timestamp per
+    request in the cache, GCRA stores a single float per client: the
+    "theoretical arrival time" (TAT) of the next request. Memory and
+    (de)serialization cost are therefore constant regardless of the rate.
+
+    Rates use the DRF format ("45/min"); a burst of up to `num_requests`
+    is allowed, refilling smoothly at `num_requests / duration`.
+
+    On Redis the whole update runs as one Lua script (atomic). Other backends
+    guard the read-modify-write with a short lock taken with `cache.add`
+    (atomic on every Django backend). The lock only covers a get and a set,
+    so a request that finds it held retries a few times, a few ms apart.
+    If it is still held (e.g. a worker died holding it), the request is
+    checked and counted without the lock, as DRF's own throttles do.
+    Contention alone never turns into a 429.
+    """
+    cache = default_cache
+    timer = time.time
+    cache_format = "throttle_%(scope)s_%(ident)s"
+    scope = None
+    THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+
+    lock_timeout = 1        # seconds; lock auto-expires if a worker dies mid-update
+    lock_attempts = 5
+    lock_backoff = 0.005    # seconds between attempts
+
+    def __init__(self):
+        self.key = None
+        self.retry_after = None
+
+    def get_cache_key(self, request, view) -> Optional[str]:
+        """
+        Return the bucket key for this request, or None to skip throttling.
+        """
+        raise NotImplementedError(".get_cache_key() must be overridden")
+
+    def get_rate(self) -> Optional[str]:
+        """
+        Look up the rate string for `self.scope`.
+        """
+        if not self.scope:
+            raise ImproperlyConfigured(
+                f"You must set `.scope` for '{self.__class__.__name__}' throttle")
+        try:
+            return self.THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No default throttle rate set for '{self.scope}' scope")
+
+    @staticmethod
+    def parse_rate(rate: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+        """
+        "45/min" -> (45, 60). None -> (None, None).
+        """
+        if rate is None:
+            return None, None
+        num, period = rate.split("/")
+        return int(num), _PERIODS[period[0]]
+
+    def allow_request(self, request, view) -> bool:
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        num_requests, duration = self.parse_rate(self.get_rate())
+        if num_requests is None:
+            return True
+
+        # T = spacing between requests at the sustained rate; tau = burst tolerance.
+        interval = duration / num_requests
+        tolerance = interval * (num_requests - 1)
+
+        now = self.timer()
+        client = self._redis_client()
+        if client is not None:
+            return self._allow_redis(client, now, interval, tolerance)
+
+        if not self._acquire_lock():
+            # Contention is not abuse: fall back to an unguarded update.
+            log.debug("Throttle lock contention on %s; updating without the lock.", self.key)
+            return self._update(now, interval, tolerance)
+        try:
+            return self._update(now, interval, tolerance)
+        finally:
+            self.cache.delete(self._lock_key())
+
+    def _acquire_lock(self) -> bool:
+        for attempt in range(self.lock_attempts):
+            if attempt:
+                time.sleep(self.lock_backoff)
+            if self.cache.add(self._lock_key(), 1, self.lock_timeout):
+                return True
+        return False
+
+    def _update(self, now: float, interval: float, tolerance: float) -> bool:
+        tat = max(self.cache.get(self.key, now), now)
+
+        allow_at = tat - tolerance
+        if now < allow_at:
+            self.retry_after = allow_at - now
+            return False
+
+        new_tat = tat + interval
+        # Once now >= new_tat the bucket is full again; no need to keep the key.
+        self.cache.set(self.key, new_tat, max(1, int(new_tat - now) + 1))
+        self.retry_after = None
+        return True
+
+    def _allow_redis(self, client, now: float, interval: float, tolerance: float) -> bool:
+        key = self.cache.make_and_validate_key(self.key)
+        allowed, retry_after = client.register_script(_GCRA_LUA)(
+            keys=[key], args=[repr(now), repr(interval), repr(tolerance)])
+        self.retry_after = None if int(allowed) else float(retry_after)
+        return bool(int(allowed))
+
+    def _redis_client(self):
+        """
+        The raw redis-py client when the throttle cache is Django's RedisCache.
+        """
+        get_client = getattr(getattr(self.cache, "_cache", None), "get_client", None)
+        return get_client(None, write=True) if callable(get_client) else None
+
+    def wait(self) -> Optional[float]:
+        return self.retry_after
+
+    def _lock_key(self) -> str:
+        return f"{self.key}:lock"
+
+
+class AnonGCRAThrottle(GCRAThrottle):
+    """
+    Per-IP bucket for unauthenticated clients (drop-in for AnonRateThrottle).
+    """
+    scope = "anon"
+
+    def get_cache_key(self, request, view) -> Optional[str]:
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class ScopedGCRAThrottle(GCRAThrottle):
+    """
+    Per-view bucket driven by `view.throttle_scope`, with reads and writes
+    counted separately: a view with `throttle_scope = "stock"` uses the
+    "stock_read" rate for GET/HEAD/OPTIONS and "stock_write" otherwise.
+    Views without `throttle_scope` are not throttled.
+    """
+    scope_attr = "throttle_scope"
+
+    def allow_request(self, request, view) -> bool:
+        base = getattr(view, self.scope_attr, None)
+        if not base:
+            return True
+        kind = "read" if request.method in SAFE_METHODS else "write"
+        self.scope = f"{base}_{kind}"
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view) -> Optional[str]:
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": ident}
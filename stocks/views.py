@@ -1,18 +1,112 @@
 from .services.polygon_client import PolygonClient
-from .services.stock_service import get_payload_cached, bust_cache
+from .services.stock_service import (
+    get_payload_cached, bust_cache, parse_fields, RenderedPayload, STALE_WHILE_REVALIDATE, TTL,
+)
+from .services.purchases import list_purchases, DEFAULT_PAGE_SIZE
+from .services.quote_stream import (
+    EventStream, acquire_stream_slot, get_quote_hub, is_valid_symbol, release_stream_slot, MAX_SYMBOLS,
+)
+from .services import hedging, prefetch
+from .db import connections_opened
+from .renderers import EventStreamRenderer, FastJSONRenderer
 from .models import Stock
 from decimal import Decimal, InvalidOperation
+import os
 
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
 from rest_framework.views import APIView
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.throttling import ScopedRateThrottle
+
+
+def _accepts_gzip(header: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip, honouring q-values
+    ("gzip;q=0" refuses it; "*" covers gzip unless gzip is listed itself).
+    """
+    qualities = {}
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding.lower()] = q
+    q = qualities.get("gzip", qualities.get("x-gzip", qualities.get("*", 0.0)))
+    return q > 0
+
+
+def _etag_matches(request, etag: str) -> bool:
+    """
+    Weak comparison against If-None-Match, as RFC 9110 prescribes for GET.
+    """
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    tags = parse_etags(header)
+    return "*" in tags or etag in (t.removeprefix("W/") for t in tags)
+
+
+def _rendered_response(request, payload: RenderedPayload, http_status: int) -> HttpResponse:
+    """
+    Write a pre-rendered payload to the response without touching DRF's
+    renderers; serve the stored gzip body when the client accepts it.
+
+    Responses carry a strong ETag (one per encoding) and a Cache-Control
+    max-age equal to the entry's remaining TTL, so a matching If-None-Match
+    is answered with 304 and downstream caches can absorb repeat reads.
+    max-age never exceeds STOCK_CACHE_SECONDS, even when the server keeps
+    the entry for hours after the close: bust_cache can't purge a proxy, so
+    this bounds how long a POST stays invisible behind one.
+    """
+    use_gzip = (
+        payload.gzip_body is not None
+        and _accepts_gzip(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    )
+    etag = payload.etag
+    if use_gzip and etag:
+        etag = etag[:-1] + '-gzip"'
+
+    if etag and _etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            payload.gzip_body if use_gzip else payload.body,
+            status=http_status,
+            content_type="application/json",
+        )
+        if use_gzip:
+            response["Content-Encoding"] = "gzip"
+
+    if etag:
+        response["ETag"] = etag
+    patch_cache_control(response, max_age=min(payload.remaining_ttl(), TTL),
+                        stale_while_revalidate=STALE_WHILE_REVALIDATE)
+    if payload.gzip_body is not None:
+        patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
 
 class StockView(APIView):
     """
     HTTP interface for reading a consolidated stock payload (GET)
     and recording a new purchase (POST).
+
+    Rate limited per client by the GCRA throttles configured in settings.py;
+    reads and writes draw from separate "stock_read"/"stock_write" buckets.
     """
+    throttle_scope = "stock"
+
     def get(self, request, symbol):
         """
         Return the consolidated payload for `symbol`.
@@ -20,12 +114,20 @@ class StockView(APIView):
         The service returns a tuple (payload, http_status). We surface the exact
         status code, so client errors (e.g., bad ticker) and upstream failures
         (e.g., provider unavailable) are correctly reflected to the caller.
+
+        `?fields=stock_values,purchased_amount` limits the payload (and the
+        upstream work behind it) to those fields.
         """
-        # Rate limiting (see settings.py)
-        throttle_classes = [ScopedRateThrottle]
-        throttle_scope = "stock"
+        try:
+            fields = parse_fields(request.query_params.get("fields"))
+        except ValueError as e:
+            return Response({"error": f"unknown field(s): {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        payload, http_status = get_payload_cached(symbol, fields)
 
-        payload, http_status = get_payload_cached(symbol)
+        # Fast path: cached bytes for JSON clients (the browsable API still renders).
+        if isinstance(payload, RenderedPayload) and request.accepted_renderer.format == "json":
+            return _rendered_response(request, payload, http_status)
         return Response(payload, status=http_status)
 
     def post(self, request, symbol):
@@ -43,10 +145,6 @@ class StockView(APIView):
           the new purchase immediately.
         """
 
-        # Rate limiting (see settings.py)
-        throttle_classes = [ScopedRateThrottle]
-        throttle_scope = "stock"
-
         # Normalize the ticker for storage and lookups.
         symbol = symbol.upper()
 
@@ -86,3 +184,89 @@ class StockView(APIView):
         msg = f"{amount} units of stock {symbol} were added to your stock record"
         return Response(msg, status=status.HTTP_201_CREATED)
 
+
+
+class StockPurchasesView(APIView):
+    """
+    Purchase history for a ticker, newest first, with cursor pagination:
+
+        GET /api/stock/{symbol}/purchases/?limit=50&cursor=<next_cursor>
+    """
+    throttle_scope = "stock"
+
+    def get(self, request, symbol):
+        try:
+            limit = int(request.query_params.get("limit", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            page = list_purchases(symbol, request.query_params.get("cursor"), limit)
+        except ValueError:
+            return Response({"error": "invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(page)
+
+
+class QuoteStreamView(APIView):
+    """
+    Server-sent events stream of quote updates for a set of tickers:
+
+        GET /api/stream/?symbols=AAPL,MSFT
+
+    Each symbol is polled by one shared poller per process (through the payload
+    cache), however many clients watch it. Clients get a "snapshot" event with
+    the full payload, then "update" events carrying only the changed fields,
+    and "error" events when a symbol can't be refreshed. Malformed tickers are
+    rejected up front; unknown ones get one "error" event and are not polled
+    again.
+
+    Each open stream holds a worker thread, so a process serves at most
+    STREAM_MAX_OPEN streams at once; beyond that new streams get 503.
+    """
+    throttle_scope = "stream"
+    renderer_classes = [EventStreamRenderer, FastJSONRenderer]
+
+    def get(self, request):
+        raw = request.query_params.get("symbols", "")
+        symbols = sorted({s.strip().upper() for s in raw.split(",") if s.strip()})
+        if not symbols:
+            return Response({"error": "symbols is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(symbols) > MAX_SYMBOLS:
+            return Response({"error": f"at most {MAX_SYMBOLS} symbols per stream"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        invalid = [s for s in symbols if not is_valid_symbol(s)]
+        if invalid:
+            return Response({"error": f"invalid symbol(s): {', '.join(invalid)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if not acquire_stream_slot():
+            return Response({"error": "too many open streams, retry later"},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "5"})
+        body = EventStream(get_quote_hub(), symbols, on_close=release_stream_slot)
+        response = StreamingHttpResponse(body, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # don't let nginx buffer the stream
+        return response
+
+
+class MetricsView(APIView):
+    """
+    Operational metrics as JSON:
+
+        GET /api/metrics/
+
+    Polygon latency/hedging and DB connection figures are per process (the
+    worker that answered, see "pid"); prefetch counters are shared. Staff
+    users only, and only when STOCK_METRICS_ENABLED.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        if not settings.STOCK_METRICS_ENABLED:
+            return Response({"error": "not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            "pid": os.getpid(),
+            "polygon": hedging.snapshot(PolygonClient().timeout),
+            "prefetch": prefetch.stats(),
+            "db": {"connections_opened": connections_opened()},
+        })